@@ -1,13 +1,34 @@
 from __future__ import annotations
 
+import asyncio
+import cProfile
+import functools
+import heapq
+import io
+import json
 import logging
+import pstats
+import time
+import uuid
 from datetime import datetime, timezone
-from typing import Any, Dict, Optional
-import re
+from typing import Any, Awaitable, Callable, Dict, Iterable, Optional, TypeVar
 
 import discord
 from discord.ext import tasks
 from redbot.core import Config, commands
+from redbot.core.data_manager import cog_data_path
+
+from .shared import RedisBackend, SharedBackend, SharedSync, apply_changes
+from .timeparse import (
+    DEFAULT_SCHEDULE_TZ,
+    MAX_SCHEDULES,
+    _format_schedule_rule,
+    _parse_days,
+    _parse_duration,
+    _parse_time_range,
+    _parse_utc_offset,
+    _schedule_transition,
+)
 
 log = logging.getLogger("red.nexiafk")
 
@@ -22,19 +43,6 @@ def _now_ts() -> int:
     return int(datetime.now(tz=timezone.utc).timestamp())
 
 
-def _parse_duration(value: str) -> int | None:
-    value = value.strip().lower()
-    if not value:
-        return None
-    m = re.fullmatch(r"(\d+)([smhd])", value)
-    if not m:
-        return None
-    num = int(m.group(1))
-    unit = m.group(2)
-    mult = {"s": 1, "m": 60, "h": 3600, "d": 86400}[unit]
-    return num * mult
-
-
 def _format_duration(seconds: int) -> str:
     if seconds <= 0:
         return "0초"
@@ -53,6 +61,152 @@ def _format_duration(seconds: int) -> str:
     return " ".join(parts) if parts else "0초"
 
 
+class _TokenBucket:
+    """burst개까지 쌓이고 period초마다 burst개가 채워지는 토큰 버킷."""
+
+    __slots__ = ("burst", "period", "tokens", "updated")
+
+    def __init__(self, burst: int, period: int) -> None:
+        self.burst = burst
+        self.period = period
+        self.tokens = float(burst)
+        self.updated = time.monotonic()
+
+    def configure(self, burst: int, period: int) -> None:
+        if burst == self.burst and period == self.period:
+            return
+        self.burst = burst
+        self.period = period
+        self.tokens = min(self.tokens, float(burst))
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        elapsed = now - self.updated
+        self.updated = now
+        if elapsed > 0 and self.period > 0:
+            self.tokens = min(
+                float(self.burst), self.tokens + elapsed * self.burst / self.period
+            )
+
+    def peek(self) -> bool:
+        self._refill()
+        return self.tokens >= 1.0
+
+    def take(self) -> None:
+        self.tokens -= 1.0
+
+
+class _ActivityTracker:
+    """사용자 활동 시각을 메모리에서 모아두는 추적기.
+
+    사용자별로 granularity초에 한 번만 기록하며, 기록된 값은 drain()으로
+    자동 AFK 작업이 가져가 한 번에 저장한다.
+    """
+
+    __slots__ = ("_last", "_dirty")
+
+    def __init__(self) -> None:
+        self._last: Dict[tuple[int, int], int] = {}
+        self._dirty: Dict[int, Dict[int, int]] = {}
+
+    def touch(self, guild_id: int, user_id: int, now: int, granularity: int) -> bool:
+        key = (guild_id, user_id)
+        if now - self._last.get(key, 0) < granularity:
+            return False
+        self._last[key] = now
+        self._dirty.setdefault(guild_id, {})[user_id] = now
+        return True
+
+    def drain(self, guild_id: int) -> Dict[int, int]:
+        return self._dirty.pop(guild_id, {})
+
+
+_T = TypeVar("_T")
+
+
+class _ProfileSession:
+    """`afkadmin profile` 동안 Cog 코루틴의 실행 구간만 cProfile로 측정."""
+
+    def __init__(self) -> None:
+        self.profiler = cProfile.Profile()
+        self.depth = 0
+        # 이름 -> [호출 수, 전체 시간, 실행 시간]; 전체 - 실행 = await 대기 시간
+        self.handlers: Dict[str, list[float]] = {}
+
+    def record(self, name: str, wall: float, run: float) -> None:
+        stat = self.handlers.setdefault(name, [0, 0.0, 0.0])
+        stat[0] += 1
+        stat[1] += wall
+        stat[2] += run
+
+    def wrap(self, name: str, coro: Awaitable[_T]) -> Awaitable[_T]:
+        return _ProfiledCoroutine(self, name, coro)
+
+
+class _ProfiledCoroutine:
+    """코루틴을 직접 한 단계씩 실행하며, 각 단계 동안에만 프로파일러를 켠다.
+
+    단계 사이(await 대기 중)에는 다른 코드가 실행되므로 측정하지 않는다.
+    """
+
+    __slots__ = ("session", "name", "coro")
+
+    def __init__(self, session: _ProfileSession, name: str, coro: Any) -> None:
+        self.session = session
+        self.name = name
+        self.coro = coro
+
+    def __await__(self):
+        session = self.session
+        coro = self.coro
+        started = time.perf_counter()
+        run = 0.0
+        value: Any = None
+        error: Optional[BaseException] = None
+        while True:
+            step = time.perf_counter()
+            if session.depth == 0:
+                session.profiler.enable()
+            session.depth += 1
+            done = True
+            try:
+                if error is not None:
+                    future = coro.throw(error)
+                else:
+                    future = coro.send(value)
+                done = False
+            except StopIteration as exc:
+                return exc.value
+            finally:
+                session.depth -= 1
+                if session.depth == 0:
+                    session.profiler.disable()
+                run += time.perf_counter() - step
+                if done:
+                    session.record(self.name, time.perf_counter() - started, run)
+            error = None
+            value = None
+            try:
+                value = yield future
+            except BaseException as exc:
+                error = exc
+
+
+def _profiled(
+    func: Callable[..., Awaitable[_T]]
+) -> Callable[..., Awaitable[_T]]:
+    """프로파일 세션이 있을 때만 측정하는 데코레이터. 꺼져 있으면 속성 확인 한 번뿐."""
+
+    @functools.wraps(func)
+    async def wrapper(self: "NexiAFK", *args: Any, **kwargs: Any) -> _T:
+        session = self._profile_session
+        if session is None:
+            return await func(self, *args, **kwargs)
+        return await session.wrap(func.__name__, func(self, *args, **kwargs))
+
+    return wrapper
+
+
 class NexiAFK(commands.Cog):
     """특정 사용자만 AFK를 사용하고 멘션 시 자동 응답하는 Cog."""
 
@@ -71,13 +225,84 @@ class NexiAFK(commands.Cog):
             ignore_bots=True,
             enable_offduty_autofk=False,
             offduty_tag="[OFFDUTY]",
+            activity_granularity_seconds=60,
+            reply_limit_enabled=True,
+            reply_limit_mode="summary",
+            reply_channel_burst=3,
+            reply_channel_period=10,
+            reply_guild_burst=10,
+            reply_guild_period=10,
+            reply_summary_seconds=30,
         )
 
-        self._auto_task.start()
+        self._channel_buckets: Dict[int, _TokenBucket] = {}
+        self._guild_buckets: Dict[int, _TokenBucket] = {}
+        self._reply_stats: Dict[int, Dict[str, int]] = {}
+        self._reply_summaries: Dict[int, Dict[int, Dict[str, Any]]] = {}
+        self._reply_summary_tasks: Dict[int, asyncio.Task] = {}
+        # 자동 AFK 등 시간 기반 기능이 켜진 길드. 비어 있으면 _auto_task를 돌리지 않는다.
+        self._timed_guilds: set[int] = set()
+        self._init_task: Optional[asyncio.Task] = None
+        # 정리(compaction)가 필요한 길드. 백그라운드 작업이 한 길드씩 처리한다.
+        self._compact_pending: set[int] = set()
+        self._compact_task: Optional[asyncio.Task] = None
+        # 활동 추적용 캐시. 이벤트마다 Config를 읽지 않도록 허용 목록을 메모리에 둔다.
+        self._activity = _ActivityTracker()
+        self._allowed_cache: Dict[int, frozenset[int]] = {}
+        self._activity_granularity: Dict[int, int] = {}
+        # 길드별 역할 ID -> AFK 중인 허용 사용자 ID. 역할 멘션 시 멤버 전체를 훑지 않기 위함.
+        self._role_index: Dict[int, Dict[int, set[int]]] = {}
+        self._afk_members: Dict[int, set[int]] = {}
+        # 반복 AFK 스케줄: (다음 전환 시각, 길드, 사용자) 힙. 사용자별 최신 값만 유효.
+        self._schedule_heap: list[tuple[int, int, int]] = []
+        self._schedule_next: Dict[tuple[int, int], int] = {}
+        self._profile_session: Optional[_ProfileSession] = None
+        # 다중 프로세스 상태 공유 (afkadmin shared). 꺼져 있으면 None.
+        self.config.register_global(shared_backend="off", shared_redis_url=None)
+        self._instance_id = uuid.uuid4().hex
+        self._shared: Optional[SharedSync] = None
+
+    async def cog_load(self) -> None:
+        # 로드 시에는 아무것도 기다리지 않고, 초기 스캔은 백그라운드에서 수행
+        self._init_task = asyncio.create_task(self._initialize())
+
+    async def _initialize(self) -> None:
+        await self.bot.wait_until_red_ready()
+        try:
+            all_guilds = await self.config.all_guilds()
+        except Exception:
+            log.exception("Config 읽기 실패(초기화)")
+            return
+        now = _now_ts()
+        for guild_id, conf in all_guilds.items():
+            self._cache_guild_conf(guild_id, conf)
+            self._seed_schedules(guild_id, conf, now)
+            if self._guild_needs_timer(conf):
+                self._timed_guilds.add(guild_id)
+            if conf.get("afk_state"):
+                self._schedule_compaction(guild_id)
+        self._sync_auto_task()
+        try:
+            if await self.config.shared_backend() == "redis":
+                url = await self.config.shared_redis_url()
+                await self._start_shared(RedisBackend(url))
+        except Exception:
+            log.exception("공유 상태 백엔드 연결 실패")
 
     def cog_unload(self) -> None:
+        if self._init_task is not None:
+            self._init_task.cancel()
+        if self._compact_task is not None:
+            self._compact_task.cancel()
         self._auto_task.cancel()
-
+        if self._shared is not None:
+            asyncio.create_task(self._shared.close())
+            self._shared = None
+        for task in self._reply_summary_tasks.values():
+            task.cancel()
+        self._reply_summary_tasks.clear()
+
+    @_profiled
     async def _send_log(
         self,
         guild: discord.Guild,
@@ -142,6 +367,85 @@ class NexiAFK(commands.Cog):
             except Exception:
                 log.exception("임베드 reply/send 모두 실패")
 
+    def _bump_reply_stat(self, guild_id: int, key: str) -> None:
+        stats = self._reply_stats.setdefault(
+            guild_id, {"sent": 0, "dropped": 0, "coalesced": 0}
+        )
+        stats[key] += 1
+
+    def _get_bucket(
+        self, store: Dict[int, _TokenBucket], key: int, burst: int, period: int
+    ) -> _TokenBucket:
+        bucket = store.get(key)
+        if bucket is None:
+            bucket = _TokenBucket(burst, period)
+            store[key] = bucket
+        else:
+            bucket.configure(burst, period)
+        return bucket
+
+    def _reply_allowed(self, message: discord.Message, conf: Dict[str, Any]) -> bool:
+        """채널/서버 토큰 버킷을 모두 통과하면 토큰을 소모하고 True."""
+        if not conf.get("reply_limit_enabled", True):
+            return True
+        channel_bucket = self._get_bucket(
+            self._channel_buckets,
+            message.channel.id,
+            int(conf.get("reply_channel_burst", 3)),
+            int(conf.get("reply_channel_period", 10)),
+        )
+        guild_bucket = self._get_bucket(
+            self._guild_buckets,
+            message.guild.id,
+            int(conf.get("reply_guild_burst", 10)),
+            int(conf.get("reply_guild_period", 10)),
+        )
+        if not (channel_bucket.peek() and guild_bucket.peek()):
+            return False
+        channel_bucket.take()
+        guild_bucket.take()
+        return True
+
+    def _queue_reply_summary(
+        self,
+        message: discord.Message,
+        target: discord.abc.User,
+        since_ts: int,
+        delay: int,
+    ) -> None:
+        pending = self._reply_summaries.setdefault(message.channel.id, {})
+        item = pending.setdefault(target.id, {"count": 0, "since_ts": since_ts})
+        item["count"] += 1
+        if message.channel.id not in self._reply_summary_tasks:
+            self._reply_summary_tasks[message.channel.id] = asyncio.create_task(
+                self._flush_reply_summary(message.channel, delay)
+            )
+
+    async def _flush_reply_summary(
+        self, channel: discord.abc.Messageable, delay: int
+    ) -> None:
+        try:
+            await asyncio.sleep(delay)
+        except asyncio.CancelledError:
+            return
+        finally:
+            self._reply_summary_tasks.pop(channel.id, None)
+        pending = self._reply_summaries.pop(channel.id, None)
+        if not pending:
+            return
+        lines = []
+        for uid, item in pending.items():
+            since_ts = int(item.get("since_ts", 0) or 0)
+            since_text = f"<t:{since_ts}:R>" if since_ts > 0 else "N/A"
+            lines.append(f"<@{uid}> — 멘션 {item['count']}회 (AFK 시작 {since_text})")
+        embed = discord.Embed(title="AFK 알림 요약", description="\n".join(lines[:20]))
+        try:
+            await channel.send(
+                embed=embed, allowed_mentions=discord.AllowedMentions.none()
+            )
+        except Exception:
+            log.exception("AFK 알림 요약 전송 실패")
+
     async def _safe_dm(self, user: discord.abc.User, embed: discord.Embed) -> None:
         try:
             await user.send(embed=embed)
@@ -177,8 +481,312 @@ class NexiAFK(commands.Cog):
             "auto_afk_seconds": 0,
             "auto_afk_enabled": False,
             "last_activity_ts": 0,
+            "schedules": [],
+            "schedule_active": False,
         }
 
+    def _entry_needs_timer(self, entry: Dict[str, Any]) -> bool:
+        return bool(entry.get("auto_afk_enabled")) and int(
+            entry.get("auto_afk_seconds") or 0
+        ) > 0
+
+    def _guild_needs_timer(self, conf: Dict[str, Any]) -> bool:
+        allowed = set(conf.get("allowed_user_ids", []))
+        for uid_str, entry in conf.get("afk_state", {}).items():
+            if not uid_str.isdigit() or int(uid_str) not in allowed:
+                continue
+            if self._entry_needs_timer(entry):
+                return True
+        return False
+
+    def _sync_auto_task(self) -> None:
+        if self._timed_guilds or self._schedule_next:
+            if not self._auto_task.is_running():
+                self._auto_task.start()
+        elif self._auto_task.is_running():
+            self._auto_task.cancel()
+
+    async def _refresh_timed_guild(self, guild: discord.Guild) -> None:
+        """길드의 시간 기반 기능 사용 여부를 다시 계산하고 _auto_task를 켜고/끈다."""
+        try:
+            conf = await self.config.guild(guild).all()
+        except Exception:
+            log.exception("Config 읽기 실패(타이머 갱신)")
+            return
+        self._cache_guild_conf(guild.id, conf)
+        self._seed_schedules(guild.id, conf, _now_ts())
+        if self._guild_needs_timer(conf):
+            self._timed_guilds.add(guild.id)
+        else:
+            self._timed_guilds.discard(guild.id)
+        self._sync_auto_task()
+
+    def _push_schedule(self, guild_id: int, user_id: int, ts: Optional[int]) -> None:
+        key = (guild_id, user_id)
+        if ts is None:
+            self._schedule_next.pop(key, None)
+            return
+        self._schedule_next[key] = ts
+        heapq.heappush(self._schedule_heap, (ts, guild_id, user_id))
+
+    def _plan_schedule(
+        self, guild_id: int, user_id: int, entry: Dict[str, Any], now: int
+    ) -> None:
+        rules = entry.get("schedules") or []
+        if not rules:
+            self._push_schedule(guild_id, user_id, None)
+            return
+        active, next_ts = _schedule_transition(rules, now)
+        if active != bool(entry.get("schedule_active")):
+            # 현재 상태가 스케줄과 어긋나 있으면 다음 틱에 바로 반영
+            next_ts = now
+        self._push_schedule(guild_id, user_id, next_ts)
+
+    def _seed_schedules(self, guild_id: int, conf: Dict[str, Any], now: int) -> None:
+        allowed = set(conf.get("allowed_user_ids", []))
+        for uid_str, entry in conf.get("afk_state", {}).items():
+            if uid_str.isdigit() and int(uid_str) in allowed:
+                self._plan_schedule(guild_id, int(uid_str), entry, now)
+
+    def _pop_due_schedules(self, now: int) -> Dict[int, set[int]]:
+        due: Dict[int, set[int]] = {}
+        while self._schedule_heap and self._schedule_heap[0][0] <= now:
+            ts, guild_id, user_id = heapq.heappop(self._schedule_heap)
+            if self._schedule_next.get((guild_id, user_id)) != ts:
+                continue
+            del self._schedule_next[(guild_id, user_id)]
+            due.setdefault(guild_id, set()).add(user_id)
+        return due
+
+    def _cache_guild_conf(self, guild_id: int, conf: Dict[str, Any]) -> None:
+        self._allowed_cache[guild_id] = frozenset(conf.get("allowed_user_ids", []))
+        self._activity_granularity[guild_id] = int(
+            conf.get("activity_granularity_seconds", 60) or 60
+        )
+
+    async def _record_activity(self, guild: discord.Guild, user_id: int) -> None:
+        allowed = self._allowed_cache.get(guild.id)
+        if allowed is None:
+            # 길드당 최초 한 번만 Config를 읽는다
+            try:
+                conf = await self.config.guild(guild).all()
+            except Exception:
+                log.exception("Config 읽기 실패(활동 기록)")
+                return
+            self._cache_guild_conf(guild.id, conf)
+            allowed = self._allowed_cache[guild.id]
+        if user_id not in allowed:
+            return
+        self._activity.touch(
+            guild.id, user_id, _now_ts(), self._activity_granularity.get(guild.id, 60)
+        )
+
+    def _build_role_index(self, guild: discord.Guild, conf: Dict[str, Any]) -> None:
+        allowed = set(conf.get("allowed_user_ids", []))
+        self._role_index[guild.id] = {}
+        self._afk_members[guild.id] = set()
+        for uid_str, entry in conf.get("afk_state", {}).items():
+            if not uid_str.isdigit() or int(uid_str) not in allowed:
+                continue
+            if entry.get("enabled"):
+                self._index_set_afk(guild, int(uid_str), True)
+
+    def _index_set_afk(self, guild: discord.Guild, user_id: int, enabled: bool) -> None:
+        """AFK 전환을 역할 인덱스에 반영. 인덱스가 아직 없으면 나중에 통째로 만든다."""
+        index = self._role_index.get(guild.id)
+        if index is None:
+            return
+        members = self._afk_members[guild.id]
+        member = guild.get_member(user_id)
+        if enabled:
+            members.add(user_id)
+            if member is not None:
+                for role in member.roles:
+                    if not role.is_default():
+                        index.setdefault(role.id, set()).add(user_id)
+            return
+        members.discard(user_id)
+        for role_id in [rid for rid, uids in index.items() if user_id in uids]:
+            index[role_id].discard(user_id)
+            if not index[role_id]:
+                del index[role_id]
+
+    def _invalidate_role_index(self, guild_id: int) -> None:
+        self._role_index.pop(guild_id, None)
+        self._afk_members.pop(guild_id, None)
+
+    def _is_default_entry(self, entry: Dict[str, Any]) -> bool:
+        # since_ts/last_auto_reply_ts/last_activity_ts는 AFK·자동 AFK가 꺼져 있으면 의미 없음
+        if entry.get("enabled"):
+            return False
+        if entry.get("message_override"):
+            return False
+        if not entry.get("auto_clear_on_message", True):
+            return False
+        if entry.get("auto_afk_enabled") or int(entry.get("auto_afk_seconds") or 0) > 0:
+            return False
+        if entry.get("schedules"):
+            return False
+        return True
+
+    def _compact_state(
+        self, guild: discord.Guild, conf: Dict[str, Any], now: int
+    ) -> Dict[str, Any]:
+        """허용되지 않았거나 서버를 떠난 사용자, 기본값 항목, 만료된 쿨다운을 제거한 afk_state."""
+        allowed = set(conf.get("allowed_user_ids", []))
+        cooldown_seconds = int(conf.get("cooldown_seconds", 30) or 30)
+        # 멤버 캐시가 완전하지 않으면 get_member()가 None이어도 탈퇴로 볼 수 없음
+        check_members = guild.chunked
+        compacted: Dict[str, Any] = {}
+        for uid_str, entry in conf.get("afk_state", {}).items():
+            if not uid_str.isdigit() or int(uid_str) not in allowed:
+                continue
+            if check_members and guild.get_member(int(uid_str)) is None:
+                continue
+            if self._is_default_entry(entry):
+                continue
+            entry = dict(entry)
+            last_val = entry.get("last_auto_reply_ts", 0)
+            if not entry.get("enabled"):
+                entry["last_auto_reply_ts"] = 0
+            elif isinstance(last_val, dict):
+                entry["last_auto_reply_ts"] = {
+                    ch: ts
+                    for ch, ts in last_val.items()
+                    if int(ts or 0) + cooldown_seconds > now
+                } or 0
+            compacted[uid_str] = entry
+        return compacted
+
+    async def _compact_guild(self, guild: discord.Guild) -> tuple[int, int]:
+        """길드의 afk_state를 정리하고 (제거된 항목 수, 절약된 바이트)를 반환."""
+        conf = await self.config.guild(guild).all()
+        before = conf.get("afk_state", {})
+        after = self._compact_state(guild, conf, _now_ts())
+        if after == before:
+            return 0, 0
+        changed = [
+            uid for uid in before.keys() | after.keys() if before.get(uid) != after.get(uid)
+        ]
+        # 정리 결과는 프로세스마다 다를 수 있으므로 공유하지 않고 로컬에만 저장
+        await self._save_afk_state(guild, after, changed, publish=False)
+        if self._shared is not None:
+            self._shared.record_local(guild.id, after, changed)
+        self._invalidate_role_index(guild.id)
+        reclaimed = len(json.dumps(before)) - len(json.dumps(after))
+        return len(before) - len(after), max(reclaimed, 0)
+
+    def _schedule_compaction(self, guild_id: int) -> None:
+        self._compact_pending.add(guild_id)
+        if self._compact_task is None or self._compact_task.done():
+            self._compact_task = asyncio.create_task(self._compaction_worker())
+
+    async def _compaction_worker(self) -> None:
+        # 변경이 몰릴 때 한 번에 처리하도록 잠시 대기한 뒤, 길드 하나씩 나눠서 정리
+        await asyncio.sleep(60)
+        while self._compact_pending:
+            guild_id = self._compact_pending.pop()
+            guild = self.bot.get_guild(guild_id)
+            if guild is None:
+                continue
+            try:
+                removed, reclaimed = await self._compact_guild(guild)
+                if removed or reclaimed:
+                    log.debug(
+                        "afk_state 정리: guild=%s entries=%s bytes=%s",
+                        guild_id,
+                        removed,
+                        reclaimed,
+                    )
+            except Exception:
+                log.exception("afk_state 정리 실패")
+            await asyncio.sleep(1)
+
+    async def _save_afk_state(
+        self,
+        guild: discord.Guild,
+        state: Dict[str, Any],
+        changed: Iterable[str],
+        *,
+        publish: bool = True,
+    ) -> None:
+        """호출자가 바꾼 사용자 항목만 저장/공유.
+
+        핸들러가 들고 있는 afk_state는 await 도중 낡을 수 있으므로, 통째로 덮어쓰지 않고
+        changed에 있는 키만 현재 Config에 반영한다. state에 없는 키는 삭제로 본다.
+        """
+        changed = list(changed)
+        if not changed:
+            return
+        async with self.config.guild(guild).afk_state() as current:
+            apply_changes(current, state, changed)
+        if publish and self._shared is not None:
+            await self._shared.publish(guild.id, state, changed)
+
+    async def _read_shared_state(self, guild_id: int) -> Dict[str, Any]:
+        return await self.config.guild_from_id(guild_id).afk_state()
+
+    async def _adopt_remote_entry(
+        self, guild_id: int, key: str, entry: Optional[Dict[str, Any]]
+    ) -> bool:
+        guild = self.bot.get_guild(guild_id)
+        if guild is None:
+            return False
+        # 다른 프로세스에서 온 변경은 다시 발행하지 않도록 Config에 직접 저장
+        async with self.config.guild(guild).afk_state() as current:
+            apply_changes(current, {} if entry is None else {key: entry}, [key])
+        self._apply_remote_entry(guild, int(key), entry)
+        return True
+
+    def _apply_remote_entry(
+        self, guild: discord.Guild, user_id: int, entry: Optional[Dict[str, Any]]
+    ) -> None:
+        allowed = self._allowed_cache.get(guild.id, frozenset())
+        enabled = bool(entry and entry.get("enabled")) and user_id in allowed
+        self._index_set_afk(guild, user_id, enabled)
+        if user_id in allowed:
+            self._plan_schedule(guild.id, user_id, entry or {}, _now_ts())
+            if entry and self._entry_needs_timer(entry):
+                self._timed_guilds.add(guild.id)
+        self._sync_auto_task()
+
+    async def _start_shared(self, backend: SharedBackend) -> None:
+        await self._stop_shared()
+        sync = SharedSync(
+            backend,
+            self._instance_id,
+            guild_ids=lambda: [guild.id for guild in self.bot.guilds],
+            read_state=self._read_shared_state,
+            adopt_entry=self._adopt_remote_entry,
+        )
+        await sync.connect()
+        self._shared = sync
+        await sync.resync()
+
+    async def _stop_shared(self) -> None:
+        sync, self._shared = self._shared, None
+        if sync is not None:
+            await sync.close()
+
+    def _can_skip_message(self, message: discord.Message) -> bool:
+        """메모리 인덱스만으로 처리할 일이 없다고 확인되면 True (Config 읽기 생략)."""
+        guild_id = message.guild.id
+        allowed = self._allowed_cache.get(guild_id)
+        afk_members = self._afk_members.get(guild_id)
+        if allowed is None or afk_members is None:
+            return False
+        if message.author.id in allowed:
+            return False
+        if not afk_members:
+            return True
+        if any(mention.id in afk_members for mention in message.mentions):
+            return False
+        resolved = message.reference.resolved if message.reference is not None else None
+        if isinstance(resolved, discord.Message) and resolved.author.id in afk_members:
+            return False
+        index = self._role_index.get(guild_id, {})
+        return not any(index.get(role_id) for role_id in message.raw_role_mentions)
+
     def _get_last_ts(
         self,
         entry: Dict[str, Any],
@@ -227,6 +835,8 @@ class NexiAFK(commands.Cog):
             if not entry.get("enabled"):
                 entry["enabled"] = True
                 entry["since_ts"] = now
+                entry["schedule_active"] = False
+                self._index_set_afk(ctx.guild, ctx.author.id, True)
                 msg = entry.get("message_override") or (
                     await self.config.guild(ctx.guild).guild_default_message()
                 )
@@ -244,8 +854,10 @@ class NexiAFK(commands.Cog):
                 entry["enabled"] = False
                 entry["since_ts"] = 0
                 entry["last_auto_reply_ts"] = 0
+                self._index_set_afk(ctx.guild, ctx.author.id, False)
                 embed = discord.Embed(title="AFK 해제됨")
                 await self._safe_ctx_send_embed(ctx, embed)
+                self._schedule_compaction(ctx.guild.id)
                 await self._send_log(
                     ctx.guild,
                     action="AFK OFF",
@@ -253,7 +865,7 @@ class NexiAFK(commands.Cog):
                     target=ctx.author,
                 )
             state[key] = entry
-            await self.config.guild(ctx.guild).afk_state.set(state)
+            await self._save_afk_state(ctx.guild, state, [key])
         except Exception:
             log.exception("AFK 토글 실패")
             await ctx.send("일시적 오류가 발생했습니다. 잠시 후 다시 시도해주세요.")
@@ -313,7 +925,7 @@ class NexiAFK(commands.Cog):
             entry.setdefault("auto_clear_on_message", True)
             entry["message_override"] = message
             state[key] = entry
-            await self.config.guild(ctx.guild).afk_state.set(state)
+            await self._save_afk_state(ctx.guild, state, [key])
             embed = discord.Embed(title="개인 AFK 멘트를 설정했습니다.")
             embed.add_field(name="메시지", value=message, inline=False)
             await self._safe_ctx_send_embed(ctx, embed)
@@ -336,7 +948,7 @@ class NexiAFK(commands.Cog):
             entry.setdefault("auto_clear_on_message", True)
             entry["message_override"] = None
             state[key] = entry
-            await self.config.guild(ctx.guild).afk_state.set(state)
+            await self._save_afk_state(ctx.guild, state, [key])
             embed = discord.Embed(title="개인 AFK 멘트를 삭제했습니다.")
             await self._safe_ctx_send_embed(ctx, embed)
         except Exception:
@@ -364,8 +976,11 @@ class NexiAFK(commands.Cog):
                     await self._safe_ctx_send_embed(ctx, embed)
                     return
                 entry["auto_afk_enabled"] = not entry.get("auto_afk_enabled", False)
+                if entry["auto_afk_enabled"]:
+                    entry["last_activity_ts"] = _now_ts()
                 state[key] = entry
-                await self.config.guild(ctx.guild).afk_state.set(state)
+                await self._save_afk_state(ctx.guild, state, [key])
+                await self._refresh_timed_guild(ctx.guild)
                 embed = discord.Embed(title="자동 AFK 토글")
                 embed.add_field(name="상태", value="ON" if entry.get("auto_afk_enabled") else "OFF", inline=False)
                 embed.add_field(name="시간", value=_format_duration(int(entry.get("auto_afk_seconds"))) , inline=False)
@@ -382,7 +997,8 @@ class NexiAFK(commands.Cog):
             entry["auto_afk_enabled"] = True
             entry["last_activity_ts"] = _now_ts()
             state[key] = entry
-            await self.config.guild(ctx.guild).afk_state.set(state)
+            await self._save_afk_state(ctx.guild, state, [key])
+            await self._refresh_timed_guild(ctx.guild)
             embed = discord.Embed(title="자동 AFK 설정 완료")
             embed.add_field(name="시간", value=_format_duration(seconds), inline=False)
             embed.add_field(name="상태", value="ON", inline=False)
@@ -391,6 +1007,134 @@ class NexiAFK(commands.Cog):
             log.exception("자동 AFK 설정 실패")
             await ctx.send("일시적 오류가 발생했습니다. 잠시 후 다시 시도해주세요.")
 
+    @afk_group.group(name="schedule", invoke_without_command=True)
+    async def afk_schedule(self, ctx: commands.Context) -> None:
+        """반복 AFK 스케줄 목록."""
+        if not await self._ensure_allowed(ctx):
+            return
+        try:
+            state = await self.config.guild(ctx.guild).afk_state()
+            entry = state.get(str(ctx.author.id), self._default_entry())
+            rules = entry.get("schedules") or []
+            embed = discord.Embed(title="AFK 스케줄")
+            if not rules:
+                embed.description = (
+                    "등록된 스케줄이 없습니다. 예: `afk schedule add 평일 22:00-08:00 KST`"
+                )
+            else:
+                embed.description = "\n".join(
+                    f"{i}. {_format_schedule_rule(rule)}" for i, rule in enumerate(rules, 1)
+                )
+                active, next_ts = _schedule_transition(rules, _now_ts())
+                if next_ts is not None:
+                    embed.add_field(
+                        name="다음 전환",
+                        value=f"{'AFK 해제' if active else 'AFK 시작'} <t:{next_ts}:R>",
+                        inline=False,
+                    )
+            await self._safe_ctx_send_embed(ctx, embed)
+        except Exception:
+            log.exception("AFK 스케줄 조회 실패")
+            await ctx.send("일시적 오류가 발생했습니다. 잠시 후 다시 시도해주세요.")
+
+    @afk_schedule.command(name="add")
+    async def afk_schedule_add(
+        self, ctx: commands.Context, days: str, time_range: str, tz: Optional[str] = None
+    ) -> None:
+        """반복 AFK 스케줄 추가 (예: 평일 22:00-08:00 KST, mon,wed 13:00+1h30m)."""
+        if not await self._ensure_allowed(ctx):
+            return
+        mask = _parse_days(days)
+        span = _parse_time_range(time_range)
+        offset = DEFAULT_SCHEDULE_TZ if tz is None else _parse_utc_offset(tz)
+        if mask is None:
+            await ctx.send("요일 형식이 올바르지 않습니다. 예: 평일, 주말, 매일, mon-fri, 월,수,금")
+            return
+        if span is None:
+            await ctx.send("시간 형식이 올바르지 않습니다. 예: 22:00-08:00, 13:00+1h30m")
+            return
+        if offset is None:
+            await ctx.send("시간대 형식이 올바르지 않습니다. 예: KST, UTC, UTC+9, -05:00")
+            return
+        try:
+            state = await self.config.guild(ctx.guild).afk_state()
+            key = str(ctx.author.id)
+            entry = state.get(key, self._default_entry())
+            rules = entry.get("schedules") or []
+            if len(rules) >= MAX_SCHEDULES:
+                await ctx.send(f"스케줄은 최대 {MAX_SCHEDULES}개까지 등록할 수 있습니다.")
+                return
+            rule = [mask, span[0], span[1], offset]
+            rules.append(rule)
+            entry["schedules"] = rules
+            await self._save_schedule_change(ctx, state, key, entry)
+            embed = discord.Embed(title="AFK 스케줄 추가")
+            embed.add_field(name="스케줄", value=_format_schedule_rule(rule), inline=False)
+            await self._safe_ctx_send_embed(ctx, embed)
+        except Exception:
+            log.exception("AFK 스케줄 추가 실패")
+            await ctx.send("일시적 오류가 발생했습니다. 잠시 후 다시 시도해주세요.")
+
+    @afk_schedule.command(name="remove")
+    async def afk_schedule_remove(self, ctx: commands.Context, number: int) -> None:
+        """반복 AFK 스케줄 삭제 (번호는 `afk schedule` 목록 기준)."""
+        if not await self._ensure_allowed(ctx):
+            return
+        try:
+            state = await self.config.guild(ctx.guild).afk_state()
+            key = str(ctx.author.id)
+            entry = state.get(key, self._default_entry())
+            rules = entry.get("schedules") or []
+            if not (1 <= number <= len(rules)):
+                await ctx.send("해당 번호의 스케줄이 없습니다.")
+                return
+            rule = rules.pop(number - 1)
+            entry["schedules"] = rules
+            await self._save_schedule_change(ctx, state, key, entry)
+            embed = discord.Embed(title="AFK 스케줄 삭제")
+            embed.add_field(name="스케줄", value=_format_schedule_rule(rule), inline=False)
+            await self._safe_ctx_send_embed(ctx, embed)
+        except Exception:
+            log.exception("AFK 스케줄 삭제 실패")
+            await ctx.send("일시적 오류가 발생했습니다. 잠시 후 다시 시도해주세요.")
+
+    @afk_schedule.command(name="clear")
+    async def afk_schedule_clear(self, ctx: commands.Context) -> None:
+        """반복 AFK 스케줄 전체 삭제."""
+        if not await self._ensure_allowed(ctx):
+            return
+        try:
+            state = await self.config.guild(ctx.guild).afk_state()
+            key = str(ctx.author.id)
+            entry = state.get(key, self._default_entry())
+            entry["schedules"] = []
+            await self._save_schedule_change(ctx, state, key, entry)
+            embed = discord.Embed(title="AFK 스케줄을 모두 삭제했습니다.")
+            await self._safe_ctx_send_embed(ctx, embed)
+        except Exception:
+            log.exception("AFK 스케줄 초기화 실패")
+            await ctx.send("일시적 오류가 발생했습니다. 잠시 후 다시 시도해주세요.")
+
+    async def _save_schedule_change(
+        self,
+        ctx: commands.Context,
+        state: Dict[str, Any],
+        key: str,
+        entry: Dict[str, Any],
+    ) -> None:
+        if not entry.get("schedules") and entry.get("schedule_active"):
+            # 스케줄이 켠 AFK가 진행 중이면 함께 해제
+            if entry.get("enabled"):
+                entry["enabled"] = False
+                entry["since_ts"] = 0
+                entry["last_auto_reply_ts"] = 0
+                self._index_set_afk(ctx.guild, ctx.author.id, False)
+            entry["schedule_active"] = False
+        state[key] = entry
+        await self._save_afk_state(ctx.guild, state, [key])
+        self._plan_schedule(ctx.guild.id, ctx.author.id, entry, _now_ts())
+        self._sync_auto_task()
+
     @afk_group.command(name="autoclear")
     async def afk_autoclear(self, ctx: commands.Context, mode: Optional[str] = None) -> None:
         """메시지 전송 시 AFK 자동 해제 토글."""
@@ -429,7 +1173,7 @@ class NexiAFK(commands.Cog):
             entry = state.get(key, self._default_entry())
             entry["auto_clear_on_message"] = value
             state[key] = entry
-            await self.config.guild(ctx.guild).afk_state.set(state)
+            await self._save_afk_state(ctx.guild, state, [key])
             embed = discord.Embed(title="자동 해제 설정 완료")
             embed.add_field(name="자동 해제", value="ON" if value else "OFF", inline=False)
             await self._safe_ctx_send_embed(ctx, embed)
@@ -442,7 +1186,7 @@ class NexiAFK(commands.Cog):
     async def afk_admin(self, ctx: commands.Context) -> None:
         """AFK 허용 사용자 관리."""
         embed = discord.Embed(title="AFK 관리자")
-        embed.add_field(name="명령어", value="add/remove/list/reset/setdefault/toggledefault/togglebots/toggleoffduty", inline=False)
+        embed.add_field(name="명령어", value="add/remove/list/reset/setdefault/toggledefault/togglebots/toggleoffduty/ratelimit/compact/activity/profile/shared", inline=False)
         await self._safe_ctx_send_embed(ctx, embed)
 
     @afk_admin.command(name="add")
@@ -462,6 +1206,8 @@ class NexiAFK(commands.Cog):
                 return
             allowed.append(user.id)
             await self.config.guild(ctx.guild).allowed_user_ids.set(allowed)
+            await self._refresh_timed_guild(ctx.guild)
+            self._invalidate_role_index(ctx.guild.id)
             embed = discord.Embed(title="허용 사용자 추가")
             embed.add_field(name="사용자", value=f"{user} ({user.id})", inline=False)
             await self._safe_ctx_send_embed(ctx, embed)
@@ -483,6 +1229,9 @@ class NexiAFK(commands.Cog):
                 return
             allowed.remove(user.id)
             await self.config.guild(ctx.guild).allowed_user_ids.set(allowed)
+            await self._refresh_timed_guild(ctx.guild)
+            self._schedule_compaction(ctx.guild.id)
+            self._index_set_afk(ctx.guild, user.id, False)
             warn = ""
             if user.id == DEFAULT_ALLOWED_USER_ID:
                 warn = " (기본 허용 사용자 제거됨)"
@@ -522,6 +1271,9 @@ class NexiAFK(commands.Cog):
             return
         try:
             await self.config.guild(ctx.guild).allowed_user_ids.set([DEFAULT_ALLOWED_USER_ID])
+            await self._refresh_timed_guild(ctx.guild)
+            self._schedule_compaction(ctx.guild.id)
+            self._invalidate_role_index(ctx.guild.id)
             embed = discord.Embed(title="허용 사용자 목록 초기화")
             await self._safe_ctx_send_embed(ctx, embed)
         except Exception:
@@ -607,6 +1359,326 @@ class NexiAFK(commands.Cog):
             log.exception("기본 멘트 변경 실패")
             await ctx.send("일시적 오류가 발생했습니다. 잠시 후 다시 시도해주세요.")
 
+    @afk_admin.command(name="activity")
+    @commands.is_owner()
+    async def afk_admin_activity(self, ctx: commands.Context, period: str) -> None:
+        """자동 AFK 활동 기록 간격 설정 (예: 1m)."""
+        if ctx.guild is None:
+            await ctx.send("이 명령어는 DM에서 사용할 수 없습니다.")
+            return
+        seconds = _parse_duration(period)
+        if seconds is None or not (5 <= seconds <= 600):
+            await ctx.send("간격은 5s~10m 사이여야 합니다.")
+            return
+        try:
+            await self.config.guild(ctx.guild).activity_granularity_seconds.set(seconds)
+            self._activity_granularity[ctx.guild.id] = seconds
+            embed = discord.Embed(title="활동 기록 간격")
+            embed.add_field(name="간격", value=_format_duration(seconds), inline=False)
+            await self._safe_ctx_send_embed(ctx, embed)
+        except Exception:
+            log.exception("activity 설정 실패")
+            await ctx.send("일시적 오류가 발생했습니다. 잠시 후 다시 시도해주세요.")
+
+    @afk_admin.command(name="profile")
+    @commands.is_owner()
+    async def afk_admin_profile(
+        self, ctx: commands.Context, duration: str, save: Optional[str] = None
+    ) -> None:
+        """지정한 시간 동안 Cog 이벤트 처리 프로파일링 (예: 30s, 30s save)."""
+        seconds = _parse_duration(duration)
+        if seconds is None or not (5 <= seconds <= 600):
+            await ctx.send("시간은 5s~10m 사이여야 합니다.")
+            return
+        if save is not None and save.lower() != "save":
+            await ctx.send("두 번째 값은 save만 가능합니다.")
+            return
+        if self._profile_session is not None:
+            await ctx.send("이미 프로파일링이 진행 중입니다.")
+            return
+        session = _ProfileSession()
+        self._profile_session = session
+        await ctx.send(f"{_format_duration(seconds)} 동안 프로파일링합니다.")
+        try:
+            await asyncio.sleep(seconds)
+        finally:
+            self._profile_session = None
+        try:
+            report = io.StringIO()
+            report.write("handler                      calls     total(s)    run(s)   await(s)\n")
+            for name, (calls, wall, run) in sorted(
+                session.handlers.items(), key=lambda item: item[1][1], reverse=True
+            ):
+                report.write(
+                    f"{name:<26} {int(calls):>7} {wall:>12.4f} {run:>9.4f} {wall - run:>10.4f}\n"
+                )
+            report.write("\n")
+            if session.handlers:
+                stats = pstats.Stats(session.profiler, stream=report)
+                stats.sort_stats(pstats.SortKey.CUMULATIVE).print_stats(30)
+            else:
+                report.write("측정된 호출이 없습니다.\n")
+            embed = discord.Embed(title="NexiAFK 프로파일")
+            embed.add_field(name="기간", value=_format_duration(seconds), inline=True)
+            embed.add_field(
+                name="호출 수",
+                value=str(sum(int(calls) for calls, _, _ in session.handlers.values())),
+                inline=True,
+            )
+            if save is not None and session.handlers:
+                path = cog_data_path(self) / f"profile-{_now_ts()}.pstats"
+                await asyncio.get_running_loop().run_in_executor(
+                    None, session.profiler.dump_stats, str(path)
+                )
+                embed.add_field(name="pstats", value=f"`{path}`", inline=False)
+            file = discord.File(
+                io.BytesIO(report.getvalue().encode("utf-8")), filename="nexiafk-profile.txt"
+            )
+            await ctx.send(embed=embed, file=file)
+        except Exception:
+            log.exception("프로파일 결과 전송 실패")
+            await ctx.send("일시적 오류가 발생했습니다. 잠시 후 다시 시도해주세요.")
+
+    @afk_admin.group(name="shared", invoke_without_command=True)
+    @commands.is_owner()
+    async def afk_admin_shared(self, ctx: commands.Context) -> None:
+        """다중 프로세스 AFK 상태 공유 상태 확인."""
+        embed = discord.Embed(title="AFK 상태 공유")
+        if self._shared is None:
+            embed.add_field(name="백엔드", value="OFF", inline=True)
+            await self._safe_ctx_send_embed(ctx, embed)
+            return
+        backend = self._shared.backend
+        stats = self._shared.stats
+        received = int(stats["received"])
+        embed.add_field(
+            name="백엔드",
+            value=backend.name + ("" if backend.connected else " (재연결 중)"),
+            inline=True,
+        )
+        embed.add_field(name="발행", value=str(int(stats["published"])), inline=True)
+        embed.add_field(name="수신", value=str(received), inline=True)
+        if received:
+            embed.add_field(
+                name="반영 지연 (평균/최대/최근)",
+                value=(
+                    f"{stats['latency_total'] / received * 1000:.1f}ms / "
+                    f"{stats['latency_max'] * 1000:.1f}ms / "
+                    f"{stats['latency_last'] * 1000:.1f}ms"
+                ),
+                inline=False,
+            )
+        await self._safe_ctx_send_embed(ctx, embed)
+
+    @afk_admin_shared.command(name="redis")
+    @commands.is_owner()
+    async def afk_admin_shared_redis(self, ctx: commands.Context, url: str) -> None:
+        """Redis 프로토콜 서버로 AFK 상태 공유 (예: redis://host:6379/0)."""
+        try:
+            # 접속 정보가 채팅에 남지 않도록 명령어 메시지 삭제 시도
+            await ctx.message.delete()
+        except Exception:
+            pass
+        try:
+            await self._start_shared(RedisBackend(url))
+            await self.config.shared_backend.set("redis")
+            await self.config.shared_redis_url.set(url)
+            embed = discord.Embed(title="AFK 상태 공유")
+            embed.add_field(name="백엔드", value="redis", inline=False)
+            await self._safe_ctx_send_embed(ctx, embed)
+        except Exception:
+            log.exception("공유 상태 백엔드 연결 실패")
+            await ctx.send("공유 상태 백엔드 연결에 실패했습니다. 주소와 redis 패키지 설치 여부를 확인해주세요.")
+
+    @afk_admin_shared.command(name="off")
+    @commands.is_owner()
+    async def afk_admin_shared_off(self, ctx: commands.Context) -> None:
+        """AFK 상태 공유 끄기."""
+        try:
+            await self._stop_shared()
+            await self.config.shared_backend.set("off")
+            embed = discord.Embed(title="AFK 상태 공유")
+            embed.add_field(name="백엔드", value="OFF", inline=False)
+            await self._safe_ctx_send_embed(ctx, embed)
+        except Exception:
+            log.exception("공유 상태 백엔드 종료 실패")
+            await ctx.send("일시적 오류가 발생했습니다. 잠시 후 다시 시도해주세요.")
+
+    @afk_admin.command(name="compact")
+    @commands.is_owner()
+    async def afk_admin_compact(self, ctx: commands.Context) -> None:
+        """AFK 상태 데이터 정리."""
+        if ctx.guild is None:
+            await ctx.send("이 명령어는 DM에서 사용할 수 없습니다.")
+            return
+        try:
+            self._compact_pending.discard(ctx.guild.id)
+            removed, reclaimed = await self._compact_guild(ctx.guild)
+            embed = discord.Embed(title="AFK 상태 데이터 정리")
+            embed.add_field(name="삭제된 항목", value=f"{removed}개", inline=True)
+            embed.add_field(name="절약된 용량", value=f"{reclaimed} bytes", inline=True)
+            if not ctx.guild.chunked:
+                embed.set_footer(text="멤버 캐시가 불완전하여 서버 탈퇴 여부는 확인하지 않았습니다.")
+            await self._safe_ctx_send_embed(ctx, embed)
+        except Exception:
+            log.exception("compact 실패")
+            await ctx.send("일시적 오류가 발생했습니다. 잠시 후 다시 시도해주세요.")
+
+    @afk_admin.group(name="ratelimit", invoke_without_command=True)
+    @commands.is_owner()
+    async def afk_admin_ratelimit(self, ctx: commands.Context) -> None:
+        """AFK 알림 전송 제한 상태 확인."""
+        if ctx.guild is None:
+            await ctx.send("이 명령어는 DM에서 사용할 수 없습니다.")
+            return
+        try:
+            conf = await self.config.guild(ctx.guild).all()
+            stats = self._reply_stats.get(
+                ctx.guild.id, {"sent": 0, "dropped": 0, "coalesced": 0}
+            )
+            embed = discord.Embed(title="AFK 알림 전송 제한")
+            embed.add_field(
+                name="상태",
+                value="ON" if conf.get("reply_limit_enabled") else "OFF",
+                inline=True,
+            )
+            embed.add_field(
+                name="초과 시",
+                value="요약" if conf.get("reply_limit_mode") == "summary" else "무시",
+                inline=True,
+            )
+            embed.add_field(
+                name="채널",
+                value=f"{conf['reply_channel_burst']}회 / {_format_duration(conf['reply_channel_period'])}",
+                inline=False,
+            )
+            embed.add_field(
+                name="서버",
+                value=f"{conf['reply_guild_burst']}회 / {_format_duration(conf['reply_guild_period'])}",
+                inline=False,
+            )
+            embed.add_field(
+                name="요약 주기",
+                value=_format_duration(conf["reply_summary_seconds"]),
+                inline=False,
+            )
+            embed.add_field(
+                name="통계",
+                value=f"전송 {stats['sent']} / 무시 {stats['dropped']} / 요약 {stats['coalesced']}",
+                inline=False,
+            )
+            await self._safe_ctx_send_embed(ctx, embed)
+        except Exception:
+            log.exception("ratelimit 조회 실패")
+            await ctx.send("일시적 오류가 발생했습니다. 잠시 후 다시 시도해주세요.")
+
+    @afk_admin_ratelimit.command(name="toggle")
+    @commands.is_owner()
+    async def afk_admin_ratelimit_toggle(self, ctx: commands.Context) -> None:
+        """AFK 알림 전송 제한 토글."""
+        if ctx.guild is None:
+            await ctx.send("이 명령어는 DM에서 사용할 수 없습니다.")
+            return
+        try:
+            current = await self.config.guild(ctx.guild).reply_limit_enabled()
+            await self.config.guild(ctx.guild).reply_limit_enabled.set(not current)
+            embed = discord.Embed(title="AFK 알림 전송 제한")
+            embed.add_field(name="상태", value="ON" if not current else "OFF", inline=False)
+            await self._safe_ctx_send_embed(ctx, embed)
+        except Exception:
+            log.exception("ratelimit toggle 실패")
+            await ctx.send("일시적 오류가 발생했습니다. 잠시 후 다시 시도해주세요.")
+
+    @afk_admin_ratelimit.command(name="mode")
+    @commands.is_owner()
+    async def afk_admin_ratelimit_mode(self, ctx: commands.Context, mode: str) -> None:
+        """제한 초과 시 동작 설정 (summary/drop)."""
+        if ctx.guild is None:
+            await ctx.send("이 명령어는 DM에서 사용할 수 없습니다.")
+            return
+        mode_l = mode.lower()
+        if mode_l not in {"summary", "drop"}:
+            await ctx.send("값은 summary/drop 중 하나여야 합니다.")
+            return
+        try:
+            await self.config.guild(ctx.guild).reply_limit_mode.set(mode_l)
+            embed = discord.Embed(title="AFK 알림 전송 제한")
+            embed.add_field(
+                name="초과 시", value="요약" if mode_l == "summary" else "무시", inline=False
+            )
+            await self._safe_ctx_send_embed(ctx, embed)
+        except Exception:
+            log.exception("ratelimit mode 실패")
+            await ctx.send("일시적 오류가 발생했습니다. 잠시 후 다시 시도해주세요.")
+
+    @afk_admin_ratelimit.command(name="channel")
+    @commands.is_owner()
+    async def afk_admin_ratelimit_channel(
+        self, ctx: commands.Context, burst: int, period: str
+    ) -> None:
+        """채널별 AFK 알림 허용량 설정 (예: 3 10s)."""
+        await self._set_reply_limit(ctx, "channel", burst, period)
+
+    @afk_admin_ratelimit.command(name="guild")
+    @commands.is_owner()
+    async def afk_admin_ratelimit_guild(
+        self, ctx: commands.Context, burst: int, period: str
+    ) -> None:
+        """서버 전체 AFK 알림 허용량 설정 (예: 10 10s)."""
+        await self._set_reply_limit(ctx, "guild", burst, period)
+
+    @afk_admin_ratelimit.command(name="summary")
+    @commands.is_owner()
+    async def afk_admin_ratelimit_summary(self, ctx: commands.Context, period: str) -> None:
+        """요약 알림 주기 설정 (예: 30s)."""
+        if ctx.guild is None:
+            await ctx.send("이 명령어는 DM에서 사용할 수 없습니다.")
+            return
+        seconds = _parse_duration(period)
+        if seconds is None or not (5 <= seconds <= 3600):
+            await ctx.send("주기는 5s~1h 사이여야 합니다.")
+            return
+        try:
+            await self.config.guild(ctx.guild).reply_summary_seconds.set(seconds)
+            embed = discord.Embed(title="AFK 알림 요약 주기")
+            embed.add_field(name="주기", value=_format_duration(seconds), inline=False)
+            await self._safe_ctx_send_embed(ctx, embed)
+        except Exception:
+            log.exception("ratelimit summary 실패")
+            await ctx.send("일시적 오류가 발생했습니다. 잠시 후 다시 시도해주세요.")
+
+    async def _set_reply_limit(
+        self, ctx: commands.Context, scope: str, burst: int, period: str
+    ) -> None:
+        if ctx.guild is None:
+            await ctx.send("이 명령어는 DM에서 사용할 수 없습니다.")
+            return
+        seconds = _parse_duration(period)
+        if seconds is None or not (1 <= seconds <= 3600):
+            await ctx.send("기간은 1s~1h 사이여야 합니다. 예: 10s, 1m")
+            return
+        if not (1 <= burst <= 100):
+            await ctx.send("허용 횟수는 1~100 사이여야 합니다.")
+            return
+        try:
+            group = self.config.guild(ctx.guild)
+            if scope == "channel":
+                await group.reply_channel_burst.set(burst)
+                await group.reply_channel_period.set(seconds)
+                title = "채널별 AFK 알림 허용량"
+            else:
+                await group.reply_guild_burst.set(burst)
+                await group.reply_guild_period.set(seconds)
+                title = "서버 AFK 알림 허용량"
+            embed = discord.Embed(title=title)
+            embed.add_field(
+                name="허용량", value=f"{burst}회 / {_format_duration(seconds)}", inline=False
+            )
+            await self._safe_ctx_send_embed(ctx, embed)
+        except Exception:
+            log.exception("ratelimit 설정 실패")
+            await ctx.send("일시적 오류가 발생했습니다. 잠시 후 다시 시도해주세요.")
+
     @afk_admin_add.error
     async def afk_admin_add_error(
         self, ctx: commands.Context, error: commands.CommandError
@@ -628,33 +1700,31 @@ class NexiAFK(commands.Cog):
         raise error
 
     @commands.Cog.listener()
+    @_profiled
     async def on_message(self, message: discord.Message) -> None:
         if message.guild is None:
             return
         if message.webhook_id is not None:
             return
+        if self._can_skip_message(message):
+            return
         try:
             conf = await self.config.guild(message.guild).all()
         except Exception:
             log.exception("Config 읽기 실패")
             return
+        if message.guild.id not in self._role_index:
+            self._build_role_index(message.guild, conf)
         if conf.get("ignore_bots") and message.author.bot:
             return
 
         allowed = set(conf.get("allowed_user_ids", []))
         afk_state = conf.get("afk_state", {})
 
-        # 활동 기록 업데이트
+        # 활동 기록 업데이트 (메모리에만 기록, 저장은 _auto_task에서 일괄 처리)
+        self._cache_guild_conf(message.guild.id, conf)
         author_key = str(message.author.id)
-        if message.author.id in allowed:
-            entry = afk_state.get(author_key, self._default_entry())
-            entry.setdefault("last_activity_ts", 0)
-            entry["last_activity_ts"] = _now_ts()
-            afk_state[author_key] = entry
-            try:
-                await self.config.guild(message.guild).afk_state.set(afk_state)
-            except Exception:
-                log.exception("활동 기록 저장 실패")
+        await self._record_activity(message.guild, message.author.id)
 
         # [OFFDUTY] 자동 AFK (길드 메시지 없음)
         if conf.get("enable_offduty_autofk") and message.author.id in allowed:
@@ -666,8 +1736,9 @@ class NexiAFK(commands.Cog):
                 entry["since_ts"] = _now_ts()
                 entry["last_auto_reply_ts"] = 0
                 afk_state[author_key] = entry
+                self._index_set_afk(message.guild, message.author.id, True)
                 try:
-                    await self.config.guild(message.guild).afk_state.set(afk_state)
+                    await self._save_afk_state(message.guild, afk_state, [author_key])
                 except Exception:
                     log.exception("OFFDUTY 자동 AFK 저장 실패")
 
@@ -686,8 +1757,9 @@ class NexiAFK(commands.Cog):
             author_entry["since_ts"] = 0
             author_entry["last_auto_reply_ts"] = 0
             afk_state[author_key] = author_entry
+            self._index_set_afk(message.guild, message.author.id, False)
             try:
-                await self.config.guild(message.guild).afk_state.set(afk_state)
+                await self._save_afk_state(message.guild, afk_state, [author_key])
             except Exception:
                 log.exception("자동 해제 저장 실패")
             since_text = f"<t:{since_ts}:R>" if since_ts > 0 else "N/A"
@@ -695,13 +1767,29 @@ class NexiAFK(commands.Cog):
             welcome_embed.add_field(name="AFK 지속시간", value=since_text, inline=False)
             await self._safe_send_embed(message, welcome_embed)
 
-        if not message.mentions:
+        # 직접 멘션 -> 답장 대상 -> 역할 멘션 순으로 AFK 대상 탐색
+        candidates: list[tuple[discord.abc.User, Optional[str]]] = [
+            (mention, None) for mention in message.mentions
+        ]
+        resolved = message.reference.resolved if message.reference is not None else None
+        if isinstance(resolved, discord.Message):
+            candidates.append((resolved.author, "답장"))
+        if message.raw_role_mentions:
+            index = self._role_index.get(message.guild.id, {})
+            for role_id in message.raw_role_mentions:
+                for uid in index.get(role_id, ()):
+                    member = message.guild.get_member(uid)
+                    if member is not None:
+                        candidates.append((member, f"<@&{role_id}> 역할 멘션"))
+
+        if not candidates:
             return
 
-        target_member: Optional[discord.Member] = None
+        target_member: Optional[discord.abc.User] = None
         target_entry: Optional[Dict[str, Any]] = None
+        target_via: Optional[str] = None
 
-        for mention in message.mentions:
+        for mention, via in candidates:
             if mention.id == message.author.id:
                 continue
             if mention.id not in allowed:
@@ -711,6 +1799,7 @@ class NexiAFK(commands.Cog):
                 continue
             target_member = mention
             target_entry = entry
+            target_via = via
             break
 
         if target_member is None or target_entry is None:
@@ -723,6 +1812,21 @@ class NexiAFK(commands.Cog):
         if last_ts + cooldown_seconds > now:
             return
 
+        # 채널/서버 단위 전송 제한 (멘션 폭주 시 Discord 레이트 리밋 보호)
+        if not self._reply_allowed(message, conf):
+            since_ts = int(target_entry.get("since_ts", 0) or 0)
+            if conf.get("reply_limit_mode", "summary") == "summary":
+                self._queue_reply_summary(
+                    message,
+                    target_member,
+                    since_ts,
+                    int(conf.get("reply_summary_seconds", 30) or 30),
+                )
+                self._bump_reply_stat(message.guild.id, "coalesced")
+            else:
+                self._bump_reply_stat(message.guild.id, "dropped")
+            return
+
         msg_override = target_entry.get("message_override")
         default_msg = conf.get("guild_default_message") or DEFAULT_MESSAGE
         msg_text = msg_override or default_msg
@@ -730,15 +1834,20 @@ class NexiAFK(commands.Cog):
         since_text = f"<t:{since_ts}:R>" if since_ts > 0 else "N/A"
         afk_embed = discord.Embed(title="AFK 알림")
         afk_embed.add_field(name="대상", value=target_member.mention, inline=False)
+        if target_via is not None:
+            afk_embed.add_field(name="경로", value=target_via, inline=False)
         afk_embed.add_field(name="메시지", value=msg_text, inline=False)
         afk_embed.add_field(name="AFK 시작", value=since_text, inline=False)
 
         await self._safe_send_embed(message, afk_embed)
+        self._bump_reply_stat(message.guild.id, "sent")
 
         try:
             self._set_last_ts(target_entry, message.channel.id, per_channel, now)
             afk_state[str(target_member.id)] = target_entry
-            await self.config.guild(message.guild).afk_state.set(afk_state)
+            await self._save_afk_state(
+                message.guild, afk_state, [str(target_member.id)]
+            )
             await self._send_log(
                 message.guild,
                 action="AUTO REPLY",
@@ -753,17 +1862,32 @@ class NexiAFK(commands.Cog):
 
 
     @tasks.loop(seconds=60)
+    @_profiled
     async def _auto_task(self) -> None:
         now = _now_ts()
-        for guild in self.bot.guilds:
+        due = self._pop_due_schedules(now)
+        for guild_id in self._timed_guilds | due.keys():
+            guild = self.bot.get_guild(guild_id)
+            if guild is None:
+                # 봇이 나간 길드: 재시도하지 않고 타이머에서 제거
+                self._drop_guild_timers(guild_id)
+                continue
             try:
                 conf = await self.config.guild(guild).all()
             except Exception:
                 log.exception("Config 읽기 실패(자동 AFK)")
+                self._retry_schedules(guild_id, due.get(guild_id, ()), now)
                 continue
             allowed = set(conf.get("allowed_user_ids", []))
             afk_state = conf.get("afk_state", {})
-            changed = False
+            changed: set[str] = set()
+            for uid, ts in self._activity.drain(guild_id).items():
+                entry = afk_state.get(str(uid))
+                if entry is None:
+                    continue
+                if ts > int(entry.get("last_activity_ts") or 0):
+                    entry["last_activity_ts"] = ts
+                    changed.add(str(uid))
             for uid_str, entry in afk_state.items():
                 try:
                     uid = int(uid_str)
@@ -790,18 +1914,67 @@ class NexiAFK(commands.Cog):
                 entry["since_ts"] = now
                 entry["last_auto_reply_ts"] = 0
                 afk_state[uid_str] = entry
-                changed = True
+                changed.add(uid_str)
+                self._index_set_afk(guild, uid, True)
                 member = guild.get_member(uid)
                 if member is not None:
                     embed = discord.Embed(title="AFK 자동 활성화")
                     embed.add_field(name="서버", value=guild.name, inline=False)
                     embed.add_field(name="AFK 시작", value=f"<t:{now}:R>", inline=False)
                     await self._safe_dm(member, embed)
+            for uid in due.get(guild_id, ()):
+                entry = afk_state.get(str(uid))
+                if uid not in allowed or entry is None:
+                    continue
+                if self._apply_schedule(guild, uid, entry, now):
+                    changed.add(str(uid))
             if changed:
                 try:
-                    await self.config.guild(guild).afk_state.set(afk_state)
+                    await self._save_afk_state(guild, afk_state, changed)
                 except Exception:
                     log.exception("자동 AFK 저장 실패")
+                    self._retry_schedules(guild_id, due.get(guild_id, ()), now)
+        # 나간 길드를 정리한 결과 남은 타이머가 없으면 루프 종료
+        self._sync_auto_task()
+
+    def _drop_guild_timers(self, guild_id: int) -> None:
+        self._timed_guilds.discard(guild_id)
+        for key in [key for key in self._schedule_next if key[0] == guild_id]:
+            del self._schedule_next[key]
+
+    def _retry_schedules(self, guild_id: int, user_ids: Iterable[int], now: int) -> None:
+        # 처리하지 못한 스케줄 전환은 다음 틱에 다시 시도
+        for uid in user_ids:
+            self._push_schedule(guild_id, uid, now + 60)
+
+    def _apply_schedule(
+        self, guild: discord.Guild, user_id: int, entry: Dict[str, Any], now: int
+    ) -> bool:
+        """스케줄 전환을 entry에 반영하고 다음 전환을 예약. 변경 여부 반환."""
+        rules = entry.get("schedules") or []
+        if not rules:
+            return False
+        active, next_ts = _schedule_transition(rules, now)
+        self._push_schedule(guild.id, user_id, next_ts)
+        changed = False
+        if active and not entry.get("schedule_active"):
+            # 이미 수동으로 AFK인 경우는 건드리지 않고, 스케줄이 켠 AFK만 나중에 끈다
+            if not entry.get("enabled"):
+                entry["enabled"] = True
+                entry["since_ts"] = now
+                entry["last_auto_reply_ts"] = 0
+                entry["schedule_active"] = True
+                self._index_set_afk(guild, user_id, True)
+                changed = True
+        elif not active and entry.get("schedule_active"):
+            if entry.get("enabled"):
+                entry["enabled"] = False
+                entry["since_ts"] = 0
+                entry["last_auto_reply_ts"] = 0
+                self._index_set_afk(guild, user_id, False)
+            entry["schedule_active"] = False
+            changed = True
+        return changed
 
     @_auto_task.before_loop
     async def _before_auto_task(self) -> None:
@@ -809,9 +1982,16 @@ class NexiAFK(commands.Cog):
 
 
     @commands.Cog.listener()
+    @_profiled
     async def on_member_update(self, before: discord.Member, after: discord.Member) -> None:
         if after.guild is None:
             return
+        if before.roles != after.roles and after.id in self._afk_members.get(
+            after.guild.id, ()
+        ):
+            # 역할이 바뀐 AFK 사용자는 인덱스에서 빼고 새 역할로 다시 넣는다
+            self._index_set_afk(after.guild, after.id, False)
+            self._index_set_afk(after.guild, after.id, True)
         try:
             conf = await self.config.guild(after.guild).all()
         except Exception:
@@ -834,7 +2014,57 @@ class NexiAFK(commands.Cog):
         entry["since_ts"] = _now_ts()
         entry["last_auto_reply_ts"] = 0
         state[key] = entry
+        self._index_set_afk(after.guild, after.id, True)
         try:
-            await self.config.guild(after.guild).afk_state.set(state)
+            await self._save_afk_state(after.guild, state, [key])
         except Exception:
             log.exception("OFFDUTY 자동 AFK 저장 실패(멤버 업데이트)")
+
+    @commands.Cog.listener()
+    @_profiled
+    async def on_member_remove(self, member: discord.Member) -> None:
+        # 캐시가 없는 길드는 저장된 AFK 상태가 없으므로 정리할 것도 없음
+        allowed = self._allowed_cache.get(member.guild.id)
+        if allowed is not None and member.id in allowed:
+            self._schedule_compaction(member.guild.id)
+
+    @commands.Cog.listener()
+    @_profiled
+    async def on_raw_reaction_add(self, payload: discord.RawReactionActionEvent) -> None:
+        if payload.guild_id is None:
+            return
+        guild = self.bot.get_guild(payload.guild_id)
+        if guild is not None:
+            await self._record_activity(guild, payload.user_id)
+
+    @commands.Cog.listener()
+    @_profiled
+    async def on_voice_state_update(
+        self, member: discord.Member, before: discord.VoiceState, after: discord.VoiceState
+    ) -> None:
+        if after.channel is None and before.channel is None:
+            return
+        await self._record_activity(member.guild, member.id)
+
+    @commands.Cog.listener()
+    @_profiled
+    async def on_typing(
+        self, channel: discord.abc.Messageable, user: discord.abc.User, when: datetime
+    ) -> None:
+        guild = getattr(channel, "guild", None)
+        if guild is not None:
+            await self._record_activity(guild, user.id)
+
+    @commands.Cog.listener()
+    @_profiled
+    async def on_interaction(self, interaction: discord.Interaction) -> None:
+        if interaction.type is not discord.InteractionType.application_command:
+            return
+        if interaction.guild is not None:
+            await self._record_activity(interaction.guild, interaction.user.id)
+
+    @commands.Cog.listener()
+    @_profiled
+    async def on_guild_remove(self, guild: discord.Guild) -> None:
+        self._drop_guild_timers(guild.id)
+        self._sync_auto_task()
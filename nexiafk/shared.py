@@ -0,0 +1,388 @@
+"""여러 봇 프로세스 간 AFK 상태 공유 백엔드.
+
+각 프로세스는 자신의 Config를 그대로 사용하고, 사용자 항목이 바뀔 때마다
+백엔드에 최신 항목을 저장한 뒤 변경 이벤트를 발행한다. 다른 프로세스는
+이벤트를 받아 자신의 Config와 메모리 인덱스에 반영한다.
+
+동기화 규칙(SharedSync)은 Red에 의존하지 않으며, Config 접근은 콜백으로 받는다.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import json
+import logging
+import time
+from abc import ABC, abstractmethod
+from typing import Any, Awaitable, Callable, Dict, Iterable, Optional
+
+log = logging.getLogger("red.nexiafk.shared")
+
+EVENT_CHANNEL = "nexiafk:events"
+STATE_KEY = "nexiafk:state:{guild_id}"
+
+EventHandler = Callable[[Dict[str, Any]], Awaitable[None]]
+ReconnectHandler = Callable[[], Awaitable[None]]
+StateReader = Callable[[int], Awaitable[Dict[str, Dict[str, Any]]]]
+EntryAdopter = Callable[[int, str, Optional[Dict[str, Any]]], Awaitable[bool]]
+
+RECONNECT_MIN_DELAY = 1.0
+RECONNECT_MAX_DELAY = 60.0
+
+
+class SharedBackend(ABC):
+    """공유 상태 백엔드 인터페이스.
+
+    이벤트 형식: {"origin", "guild_id", "user_id", "entry", "sent_at"}.
+    entry가 None이면 해당 사용자 항목 삭제를 뜻한다.
+    """
+
+    name = "base"
+    connected = False
+
+    @abstractmethod
+    async def connect(
+        self, handler: EventHandler, on_reconnect: Optional[ReconnectHandler] = None
+    ) -> None:
+        """이벤트 구독 시작. 끊겼다가 다시 연결되면 on_reconnect를 호출한다."""
+
+    @abstractmethod
+    async def publish(self, event: Dict[str, Any]) -> None:
+        """사용자 항목을 저장소에 반영하고 이벤트를 발행."""
+
+    @abstractmethod
+    async def load(self, guild_id: int) -> Dict[str, Dict[str, Any]]:
+        """길드의 공유 항목 전체를 읽는다."""
+
+    @abstractmethod
+    async def close(self) -> None:
+        """구독과 연결을 정리."""
+
+
+class LocalBackend(SharedBackend):
+    """같은 프로세스 안에서 동작하는 대체 백엔드 (테스트/단일 호스트용).
+
+    namespace가 같은 인스턴스끼리 저장소와 이벤트를 공유한다.
+    """
+
+    name = "local"
+    _stores: Dict[str, Dict[int, Dict[str, Dict[str, Any]]]] = {}
+    _subscribers: Dict[str, list["LocalBackend"]] = {}
+
+    def __init__(self, namespace: str = "default") -> None:
+        self.namespace = namespace
+        self._queue: asyncio.Queue[Dict[str, Any]] = asyncio.Queue()
+        self._task: Optional[asyncio.Task] = None
+
+    async def connect(
+        self, handler: EventHandler, on_reconnect: Optional[ReconnectHandler] = None
+    ) -> None:
+        self._subscribers.setdefault(self.namespace, []).append(self)
+        self._task = asyncio.create_task(self._reader(handler))
+        self.connected = True
+
+    async def _reader(self, handler: EventHandler) -> None:
+        while True:
+            event = await self._queue.get()
+            try:
+                await handler(event)
+            except Exception:
+                log.exception("공유 이벤트 처리 실패")
+
+    async def publish(self, event: Dict[str, Any]) -> None:
+        store = self._stores.setdefault(self.namespace, {})
+        guild_state = store.setdefault(int(event["guild_id"]), {})
+        key = str(event["user_id"])
+        if event.get("entry") is None:
+            guild_state.pop(key, None)
+        else:
+            guild_state[key] = json.loads(json.dumps(event["entry"]))
+        for subscriber in self._subscribers.get(self.namespace, []):
+            subscriber._queue.put_nowait(event)
+
+    async def load(self, guild_id: int) -> Dict[str, Dict[str, Any]]:
+        guild_state = self._stores.get(self.namespace, {}).get(guild_id, {})
+        return json.loads(json.dumps(guild_state))
+
+    async def close(self) -> None:
+        subscribers = self._subscribers.get(self.namespace, [])
+        if self in subscribers:
+            subscribers.remove(self)
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+        self.connected = False
+
+
+class RedisBackend(SharedBackend):
+    """Redis 프로토콜 서버를 사용하는 백엔드. `redis` 패키지가 필요하다."""
+
+    name = "redis"
+
+    def __init__(self, url: str) -> None:
+        try:
+            import redis.asyncio as aioredis
+        except ImportError as exc:
+            raise RuntimeError("redis 백엔드에는 `pip install redis`가 필요합니다.") from exc
+        self.url = url
+        self._redis = aioredis.from_url(url, decode_responses=True)
+        self._pubsub: Any = None
+        self._task: Optional[asyncio.Task] = None
+
+    async def connect(
+        self, handler: EventHandler, on_reconnect: Optional[ReconnectHandler] = None
+    ) -> None:
+        await self._subscribe()
+        self._task = asyncio.create_task(self._reader(handler, on_reconnect))
+
+    async def _subscribe(self) -> None:
+        self._pubsub = self._redis.pubsub()
+        await self._pubsub.subscribe(EVENT_CHANNEL)
+        self.connected = True
+
+    async def _reader(
+        self, handler: EventHandler, on_reconnect: Optional[ReconnectHandler]
+    ) -> None:
+        delay = RECONNECT_MIN_DELAY
+        while True:
+            try:
+                async for message in self._pubsub.listen():
+                    if message.get("type") != "message":
+                        continue
+                    try:
+                        await handler(json.loads(message["data"]))
+                    except Exception:
+                        log.exception("공유 이벤트 처리 실패")
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                log.exception("Redis 구독 연결 끊김, %.0f초 후 재연결", delay)
+            self.connected = False
+            # 끊긴 구독 정리 후 백오프하며 재연결
+            await self._close_resource(self._pubsub)
+            while True:
+                await asyncio.sleep(delay)
+                delay = min(delay * 2, RECONNECT_MAX_DELAY)
+                try:
+                    await self._subscribe()
+                    break
+                except Exception:
+                    log.warning("Redis 재연결 실패, %.0f초 후 재시도", delay)
+            delay = RECONNECT_MIN_DELAY
+            log.info("Redis 구독 재연결됨")
+            if on_reconnect is not None:
+                try:
+                    # 끊긴 동안 놓친 이벤트는 전체 재동기화로 보정
+                    await on_reconnect()
+                except Exception:
+                    log.exception("재연결 후 재동기화 실패")
+
+    async def publish(self, event: Dict[str, Any]) -> None:
+        key = STATE_KEY.format(guild_id=event["guild_id"])
+        field = str(event["user_id"])
+        async with self._redis.pipeline(transaction=True) as pipe:
+            if event.get("entry") is None:
+                pipe.hdel(key, field)
+            else:
+                pipe.hset(key, field, json.dumps(event["entry"]))
+            pipe.publish(EVENT_CHANNEL, json.dumps(event))
+            await pipe.execute()
+
+    async def load(self, guild_id: int) -> Dict[str, Dict[str, Any]]:
+        raw = await self._redis.hgetall(STATE_KEY.format(guild_id=guild_id))
+        return {uid: json.loads(value) for uid, value in raw.items()}
+
+    async def close(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+        self.connected = False
+        await self._close_resource(self._pubsub)
+        await self._close_resource(self._redis)
+
+    @staticmethod
+    async def _close_resource(resource: Any) -> None:
+        if resource is None:
+            return
+        closer = getattr(resource, "aclose", None) or resource.close
+        try:
+            await closer()
+        except Exception:
+            log.exception("Redis 연결 종료 실패")
+
+
+def apply_changes(
+    current: Dict[str, Any], state: Dict[str, Any], changed: Iterable[str]
+) -> None:
+    """changed에 있는 사용자 항목만 current에 반영. state에 없는 키는 삭제로 본다."""
+    for uid in changed:
+        if uid in state:
+            current[uid] = state[uid]
+        else:
+            current.pop(uid, None)
+
+
+def _entry_raw(entry: Optional[Dict[str, Any]]) -> Optional[str]:
+    return json.dumps(entry, sort_keys=True) if entry is not None else None
+
+
+class SharedSync:
+    """백엔드 하나에 대한 사용자별 last-writer-wins 동기화.
+
+    known에는 길드/사용자별로 마지막으로 공유 저장소와 맞춘 항목(JSON)을 두고,
+    synced에는 이번 연결에서 한 번 이상 동기화를 마친 길드를 둔다.
+    guild_ids/read_state/adopt_entry는 참여 길드 목록, 로컬 afk_state 읽기,
+    원격 항목의 로컬 반영(Config 저장과 인덱스 갱신)을 맡는 콜백이다.
+    adopt_entry가 False를 반환하면 해당 길드를 처리하지 않은 것으로 본다.
+    """
+
+    def __init__(
+        self,
+        backend: SharedBackend,
+        instance_id: str,
+        *,
+        guild_ids: Callable[[], Iterable[int]],
+        read_state: StateReader,
+        adopt_entry: EntryAdopter,
+    ) -> None:
+        self.backend = backend
+        self.instance_id = instance_id
+        self._guild_ids = guild_ids
+        self._read_state = read_state
+        self._adopt_entry = adopt_entry
+        self._closed = False
+        self.known: Dict[int, Dict[str, str]] = {}
+        self.synced: set[int] = set()
+        self.stats: Dict[str, float] = {
+            "published": 0,
+            "received": 0,
+            "latency_total": 0.0,
+            "latency_max": 0.0,
+            "latency_last": 0.0,
+        }
+
+    async def connect(self) -> None:
+        await self.backend.connect(self.receive, self.resync)
+
+    async def close(self) -> None:
+        self._closed = True
+        self.known.clear()
+        self.synced.clear()
+        await self.backend.close()
+
+    async def publish(
+        self,
+        guild_id: int,
+        state: Dict[str, Any],
+        changed: Iterable[str],
+        *,
+        force: bool = False,
+    ) -> None:
+        """changed 항목 중 마지막으로 공유된 값과 다른 것만 발행 (force면 모두)."""
+        known = self.known.setdefault(guild_id, {})
+        for uid in changed:
+            entry = state.get(uid)
+            raw = _entry_raw(entry)
+            if not force and known.get(uid) == raw:
+                continue
+            try:
+                await self.backend.publish(
+                    {
+                        "origin": self.instance_id,
+                        "guild_id": guild_id,
+                        "user_id": int(uid),
+                        "entry": entry,
+                        "sent_at": time.time(),
+                    }
+                )
+            except Exception:
+                # known을 갱신하지 않아 다음 저장이나 재동기화 때 다시 발행된다
+                log.exception("공유 상태 발행 실패")
+                continue
+            self.stats["published"] += 1
+            if raw is None:
+                known.pop(uid, None)
+            else:
+                known[uid] = raw
+
+    def record_local(
+        self, guild_id: int, state: Dict[str, Any], changed: Iterable[str]
+    ) -> None:
+        """발행하지 않는 로컬 전용 변경(정리 등)을 기록.
+
+        known을 로컬 값으로 맞춰 두면 재동기화 때 '로컬에서 바뀐 항목'으로 보지 않으므로
+        해당 사용자는 공유 저장소 값을 따른다.
+        """
+        known = self.known.setdefault(guild_id, {})
+        for uid in changed:
+            raw = _entry_raw(state.get(uid))
+            if raw is None:
+                known.pop(uid, None)
+            else:
+                known[uid] = raw
+
+    async def receive(self, event: Dict[str, Any]) -> None:
+        if event.get("origin") == self.instance_id:
+            return
+        guild_id = int(event["guild_id"])
+        key = str(event["user_id"])
+        entry = event.get("entry")
+        if not await self._adopt_entry(guild_id, key, entry):
+            return
+        self._remember(guild_id, key, entry)
+        latency = max(time.time() - float(event.get("sent_at") or 0), 0.0)
+        stats = self.stats
+        stats["received"] += 1
+        stats["latency_total"] += latency
+        stats["latency_max"] = max(stats["latency_max"], latency)
+        stats["latency_last"] = latency
+
+    def _remember(self, guild_id: int, key: str, entry: Optional[Dict[str, Any]]) -> None:
+        known = self.known.setdefault(guild_id, {})
+        if entry is None:
+            known.pop(key, None)
+        else:
+            known[key] = _entry_raw(entry)
+
+    async def resync(self) -> None:
+        """연결/재연결 직후 전체 길드를 공유 저장소와 맞춤 (끊긴 동안 놓친 이벤트 보정)."""
+        for guild_id in list(self._guild_ids()):
+            if self._closed:
+                return
+            try:
+                await self.sync_guild(guild_id)
+            except Exception:
+                log.exception("공유 상태 동기화 실패")
+
+    async def sync_guild(self, guild_id: int) -> None:
+        """사용자별로 병합: 공유 저장소의 항목을 받아들이고, 저장소에 없는 로컬 항목은 발행.
+
+        처음 동기화하는 길드는 저장소에 있는 사용자는 저장소 값, 없는 사용자는 로컬 값을
+        따른다. 이미 동기화한 길드(재연결)는 마지막 공유 이후 로컬에서 바뀐(발행 실패한)
+        항목만 로컬 우선으로 발행한다.
+        """
+        remote = await self.backend.load(guild_id)
+        state = await self._read_state(guild_id)
+        first_sync = guild_id not in self.synced
+        known = self.known.setdefault(guild_id, {})
+        to_publish: list[str] = []
+        for uid in remote.keys() | state.keys() | known.keys():
+            local_raw = _entry_raw(state.get(uid))
+            remote_raw = _entry_raw(remote.get(uid))
+            if local_raw == remote_raw:
+                if remote_raw is None:
+                    known.pop(uid, None)
+                else:
+                    known[uid] = remote_raw
+                continue
+            if first_sync:
+                publish_local = remote_raw is None
+            else:
+                publish_local = local_raw != known.get(uid)
+            if publish_local:
+                to_publish.append(uid)
+            elif await self._adopt_entry(guild_id, uid, remote.get(uid)):
+                self._remember(guild_id, uid, remote.get(uid))
+        if to_publish:
+            await self.publish(guild_id, state, to_publish, force=True)
+        self.synced.add(guild_id)
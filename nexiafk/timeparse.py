@@ -0,0 +1,138 @@
+"""시간 길이, 요일, 반복 AFK 스케줄 파싱/계산 유틸 (Red 의존성 없음)."""
+
+from __future__ import annotations
+
+import re
+
+
+def _parse_duration(value: str) -> int | None:
+    value = value.strip().lower()
+    if not value:
+        return None
+    # 단위 조합 허용 (예: 10m, 1h30m, 1d12h)
+    if not re.fullmatch(r"(?:\d+[smhd])+", value):
+        return None
+    mult = {"s": 1, "m": 60, "h": 3600, "d": 86400}
+    return sum(int(num) * mult[unit] for num, unit in re.findall(r"(\d+)([smhd])", value))
+
+
+WEEKDAY_NAMES = ["월", "화", "수", "목", "금", "토", "일"]
+_WEEKDAY_ALIASES = {
+    "mon": 0, "tue": 1, "wed": 2, "thu": 3, "fri": 4, "sat": 5, "sun": 6,
+    **{name: i for i, name in enumerate(WEEKDAY_NAMES)},
+}
+_WEEKDAY_GROUPS = {
+    "daily": 0b1111111, "매일": 0b1111111,
+    "weekdays": 0b0011111, "평일": 0b0011111,
+    "weekends": 0b1100000, "주말": 0b1100000,
+}
+_TZ_ALIASES = {"utc": 0, "gmt": 0, "kst": 540, "jst": 540}
+DEFAULT_SCHEDULE_TZ = 540  # KST
+MAX_SCHEDULES = 10
+
+
+def _parse_days(value: str) -> int | None:
+    """요일 지정(weekdays, 주말, mon-fri, 월,수,금 등)을 월=bit0 비트마스크로 변환."""
+    value = value.strip().lower()
+    if value in _WEEKDAY_GROUPS:
+        return _WEEKDAY_GROUPS[value]
+    mask = 0
+    for part in value.split(","):
+        if "-" in part:
+            first, _, last = part.partition("-")
+            if first not in _WEEKDAY_ALIASES or last not in _WEEKDAY_ALIASES:
+                return None
+            day = _WEEKDAY_ALIASES[first]
+            while True:
+                mask |= 1 << day
+                if day == _WEEKDAY_ALIASES[last]:
+                    break
+                day = (day + 1) % 7
+        elif part in _WEEKDAY_ALIASES:
+            mask |= 1 << _WEEKDAY_ALIASES[part]
+        else:
+            return None
+    return mask or None
+
+
+def _parse_clock(value: str) -> int | None:
+    m = re.fullmatch(r"(\d{1,2}):(\d{2})", value.strip())
+    if not m or int(m.group(1)) > 23 or int(m.group(2)) > 59:
+        return None
+    return int(m.group(1)) * 60 + int(m.group(2))
+
+
+def _parse_time_range(value: str) -> tuple[int, int] | None:
+    """"22:00-08:00" 또는 "22:00+10h" 형식을 (시작 분, 지속 분)으로 변환."""
+    if "+" in value:
+        start_txt, _, dur_txt = value.partition("+")
+        start = _parse_clock(start_txt)
+        seconds = _parse_duration(dur_txt)
+        if start is None or seconds is None:
+            return None
+        duration = seconds // 60
+    else:
+        start_txt, _, end_txt = value.partition("-")
+        start = _parse_clock(start_txt)
+        end = _parse_clock(end_txt)
+        if start is None or end is None:
+            return None
+        duration = (end - start) % 1440 or 1440
+    if not (1 <= duration < 7 * 1440):
+        return None
+    return start, duration
+
+
+def _parse_utc_offset(value: str) -> int | None:
+    value = value.strip().lower()
+    if value in _TZ_ALIASES:
+        return _TZ_ALIASES[value]
+    m = re.fullmatch(r"(?:utc|gmt)?([+-])(\d{1,2})(?::?(\d{2}))?", value)
+    if not m:
+        return None
+    minutes = int(m.group(2)) * 60 + int(m.group(3) or 0)
+    if minutes > 14 * 60:
+        return None
+    return minutes if m.group(1) == "+" else -minutes
+
+
+def _format_schedule_rule(rule: list[int]) -> str:
+    mask, start, duration, offset = rule
+    groups = {v: k for k, v in _WEEKDAY_GROUPS.items() if not k.isascii()}
+    days = groups.get(mask) or ",".join(
+        name for i, name in enumerate(WEEKDAY_NAMES) if mask & (1 << i)
+    )
+    end = (start + duration) % 1440
+    sign = "+" if offset >= 0 else "-"
+    tz = f"UTC{sign}{abs(offset) // 60}" + (f":{abs(offset) % 60:02d}" if offset % 60 else "")
+    return (
+        f"{days} {start // 60:02d}:{start % 60:02d}-{end // 60:02d}:{end % 60:02d} ({tz})"
+    )
+
+
+def _schedule_transition(rules: list[list[int]], now: int) -> tuple[bool, int | None]:
+    """지금 스케줄 구간 안인지와 다음 전환(시작 또는 종료) 시각을 계산."""
+    windows = []
+    for mask, start, duration, offset in rules:
+        local_now = now + offset * 60
+        local_midnight = local_now - local_now % 86400
+        # 최대 7일 길이 구간을 고려해 앞뒤 8일을 펼친다
+        for day in range(-8, 9):
+            day_start = local_midnight + day * 86400
+            weekday = (day_start // 86400 + 3) % 7  # 1970-01-01은 목요일
+            if mask & (1 << weekday):
+                begin = day_start + start * 60 - offset * 60
+                windows.append((begin, begin + duration * 60))
+    windows.sort()
+    merged: list[list[int]] = []
+    for begin, end in windows:
+        if merged and begin <= merged[-1][1]:
+            merged[-1][1] = max(merged[-1][1], end)
+        else:
+            merged.append([begin, end])
+    for begin, end in merged:
+        if begin <= now < end:
+            return True, end
+        if begin > now:
+            return False, begin
+    return False, None
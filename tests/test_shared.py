@@ -0,0 +1,275 @@
+"""다중 프로세스 AFK 상태 공유: 사용자별 병합, 발행 재시도, 동기화 규칙 테스트."""
+
+import asyncio
+import copy
+import importlib.util
+import pathlib
+import time
+
+import pytest
+
+# nexiafk/__init__.py는 Red/discord.py를 불러오므로 shared.py만 직접 로드
+_spec = importlib.util.spec_from_file_location(
+    "nexiafk_shared",
+    pathlib.Path(__file__).resolve().parent.parent / "nexiafk" / "shared.py",
+)
+shared = importlib.util.module_from_spec(_spec)
+_spec.loader.exec_module(shared)
+
+GUILD = 1
+
+
+class _FlakyBackend(shared.LocalBackend):
+    """fail이 켜져 있으면 발행이 실패하는 LocalBackend."""
+
+    fail = False
+
+    async def publish(self, event):
+        if self.fail:
+            raise ConnectionError("down")
+        await super().publish(event)
+
+
+class _Process:
+    """봇 프로세스 하나: 길드별 afk_state를 dict로 갖는 최소 Config와 SharedSync.
+
+    save는 cog의 _save_afk_state와 같이 changed 키만 병합한 뒤 발행한다.
+    """
+
+    def __init__(self, name: str, namespace: str, guilds=(GUILD,)) -> None:
+        self.config = {guild_id: {} for guild_id in guilds}
+        self.backend = _FlakyBackend(namespace)
+        self.sync = shared.SharedSync(
+            self.backend,
+            name,
+            guild_ids=lambda: list(self.config),
+            read_state=self.read_state,
+            adopt_entry=self.adopt_entry,
+        )
+        self.latencies: list = []
+
+    async def read_state(self, guild_id):
+        return copy.deepcopy(self.config[guild_id])
+
+    async def adopt_entry(self, guild_id, key, entry):
+        if guild_id not in self.config:
+            return False
+        shared.apply_changes(self.config[guild_id], {} if entry is None else {key: entry}, [key])
+        return True
+
+    async def save(self, state, changed, *, publish=True):
+        shared.apply_changes(self.config[GUILD], state, changed)
+        if publish:
+            await self.sync.publish(GUILD, state, changed)
+        else:
+            self.sync.record_local(GUILD, state, changed)
+
+    async def start(self):
+        await self.sync.connect()
+        await self.sync.resync()
+
+
+async def _settle() -> None:
+    for _ in range(10):
+        await asyncio.sleep(0)
+
+
+def _run(coro_fn, *processes):
+    async def run():
+        try:
+            await coro_fn()
+        finally:
+            for process in processes:
+                await process.sync.close()
+
+    asyncio.run(run())
+
+
+def test_shared_backend_is_abstract():
+    with pytest.raises(TypeError):
+        shared.SharedBackend()
+
+
+def test_apply_changes_only_touches_changed_keys():
+    current = {"1": {"enabled": True}, "2": {"enabled": True}}
+    stale = {"1": {"enabled": True}, "3": {"enabled": False}}
+    shared.apply_changes(current, stale, ["3"])
+    assert current == {"1": {"enabled": True}, "2": {"enabled": True}, "3": {"enabled": False}}
+    # changed에 있지만 state에 없으면 삭제
+    shared.apply_changes(current, stale, ["2"])
+    assert current == {"1": {"enabled": True}, "3": {"enabled": False}}
+
+
+def test_stale_snapshot_keeps_other_users():
+    a = _Process("a", "stale")
+    b = _Process("b", "stale")
+
+    async def run():
+        await a.start()
+        await b.start()
+        snapshot = copy.deepcopy(a.config[GUILD])  # await 전에 읽어 둔 낡은 afk_state
+        await b.save({"2": {"enabled": True}}, ["2"])
+        await _settle()
+        snapshot["1"] = {"enabled": True}
+        await a.save(snapshot, ["1"])
+        await _settle()
+        expected = {"1": {"enabled": True}, "2": {"enabled": True}}
+        assert a.config[GUILD] == b.config[GUILD] == expected
+        assert await a.backend.load(GUILD) == expected
+
+    _run(run, a, b)
+
+
+def test_failed_publish_is_retried_on_resync():
+    a = _Process("a", "retry")
+    b = _Process("b", "retry")
+
+    async def run():
+        await a.start()
+        await b.start()
+        a.backend.fail = True
+        await a.save({"1": {"enabled": True}}, ["1"])
+        assert "1" not in a.sync.known[GUILD]
+        assert await a.backend.load(GUILD) == {}
+        # 로컬 값이 known과 다르므로 재동기화 때 로컬 우선으로 다시 발행된다
+        a.backend.fail = False
+        await a.sync.resync()
+        await _settle()
+        assert await a.backend.load(GUILD) == {"1": {"enabled": True}}
+        assert b.config[GUILD] == {"1": {"enabled": True}}
+        assert a.sync.stats["published"] == 1
+
+    _run(run, a, b)
+
+
+def test_first_sync_prefers_store_even_after_early_event():
+    b = _Process("b", "first")
+    a = _Process("a", "first")
+
+    async def run():
+        await b.start()
+        await b.save({"1": {"enabled": True, "message": "new"}}, ["1"])
+        a.config[GUILD] = {"1": {"enabled": True, "message": "old"}, "3": {"enabled": True}}
+        await a.sync.connect()
+        # 첫 동기화 전에 이벤트가 먼저 도착해도 첫 동기화 규칙은 그대로
+        await b.save({"2": {"enabled": False}}, ["2"])
+        await _settle()
+        assert GUILD not in a.sync.synced
+        await a.sync.resync()
+        await _settle()
+        expected = {
+            "1": {"enabled": True, "message": "new"},
+            "2": {"enabled": False},
+            "3": {"enabled": True},
+        }
+        assert a.config[GUILD] == b.config[GUILD] == expected
+        assert await a.backend.load(GUILD) == expected
+        assert GUILD in a.sync.synced
+
+    _run(run, a, b)
+
+
+def test_reconnect_prefers_local_changes_since_last_share():
+    a = _Process("a", "reconnect")
+    b = _Process("b", "reconnect")
+
+    async def run():
+        await a.start()
+        await b.start()
+        await a.save({"1": {"enabled": True}, "2": {"enabled": True}}, ["1", "2"])
+        await _settle()
+        # a가 끊긴 동안: a의 1번 변경은 발행 실패, b의 2번 삭제는 놓침
+        subscribers = shared.LocalBackend._subscribers["reconnect"]
+        subscribers.remove(a.backend)
+        a.backend.fail = True
+        await a.save({"1": {"enabled": False}}, ["1"])
+        a.backend.fail = False
+        await b.save({}, ["2"])
+        await _settle()
+        assert a.config[GUILD]["2"] == {"enabled": True}
+        subscribers.append(a.backend)
+        await a.sync.resync()
+        await _settle()
+        assert a.config[GUILD] == b.config[GUILD] == {"1": {"enabled": False}}
+        assert await a.backend.load(GUILD) == {"1": {"enabled": False}}
+
+    _run(run, a, b)
+
+
+def test_local_only_compaction_is_not_published():
+    a = _Process("a", "compact")
+    b = _Process("b", "compact")
+
+    async def run():
+        await a.start()
+        await b.start()
+        entry = {"enabled": False, "last_auto_reply_ts": 5}
+        await b.save({"1": entry}, ["1"])
+        await _settle()
+        # a만 정리: 1번 항목 삭제를 로컬에만 기록
+        await a.save({}, ["1"], publish=False)
+        await _settle()
+        assert b.config[GUILD] == {"1": entry}
+        assert await a.backend.load(GUILD) == {"1": entry}
+        # 재연결 때도 삭제를 발행하지 않고 저장소 값을 따른다
+        await a.sync.resync()
+        await _settle()
+        assert await a.backend.load(GUILD) == {"1": entry}
+        assert a.config[GUILD] == b.config[GUILD] == {"1": entry}
+
+    _run(run, a, b)
+
+
+def test_close_resets_first_sync():
+    a = _Process("a", "close")
+
+    async def run():
+        await a.start()
+        assert a.sync.synced == {GUILD}
+        await a.sync.close()
+        assert a.sync.synced == set()
+        assert a.sync.known == {}
+
+    asyncio.run(run())
+
+
+def test_unknown_guild_events_are_ignored():
+    a = _Process("a", "unknown")
+    b = _Process("b", "unknown", guilds=(GUILD, 2))
+
+    async def run():
+        await a.start()
+        await b.start()
+        await b.sync.publish(2, {"1": {"enabled": True}}, ["1"])
+        await _settle()
+        assert 2 not in a.config
+        assert a.sync.stats["received"] == 0
+
+    _run(run, a, b)
+
+
+def test_local_backend_convergence_latency():
+    a = _Process("a", "latency")
+    b = _Process("b", "latency")
+    original = b.sync.receive
+
+    async def timed_receive(event):
+        b.latencies.append(time.time() - event["sent_at"])
+        await original(event)
+
+    async def run():
+        await a.start()
+        b.sync.receive = timed_receive
+        await b.start()
+        for i in range(1000):
+            await a.save({str(i % 50): {"enabled": bool(i // 50 % 2)}}, [str(i % 50)])
+            await _settle()
+        assert len(b.latencies) == 1000
+        assert b.config[GUILD] == a.config[GUILD]
+        latencies = sorted(b.latencies)
+        p50 = latencies[len(latencies) // 2]
+        p99 = latencies[int(len(latencies) * 0.99)]
+        # 전송 계층만 측정하는 참고 수치라 단언하지 않는다
+        print(f"LocalBackend convergence p50={p50 * 1e3:.3f}ms p99={p99 * 1e3:.3f}ms")
+
+    _run(run, a, b)
@@ -0,0 +1,156 @@
+"""반복 AFK 스케줄 파싱/전환 계산 테스트."""
+
+import importlib.util
+import pathlib
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+# nexiafk/__init__.py는 Red/discord.py를 불러오므로 timeparse.py만 직접 로드
+_spec = importlib.util.spec_from_file_location(
+    "nexiafk_timeparse",
+    pathlib.Path(__file__).resolve().parent.parent / "nexiafk" / "timeparse.py",
+)
+timeparse = importlib.util.module_from_spec(_spec)
+_spec.loader.exec_module(timeparse)
+
+KST = timezone(timedelta(hours=9))
+NST = timezone(-timedelta(hours=3, minutes=30))
+
+
+def _ts(dt: datetime) -> int:
+    return int(dt.timestamp())
+
+
+def _rule(days: str, time_range: str, tz: str) -> list:
+    start, duration = timeparse._parse_time_range(time_range)
+    return [timeparse._parse_days(days), start, duration, timeparse._parse_utc_offset(tz)]
+
+
+@pytest.mark.parametrize(
+    "value, expected",
+    [
+        ("10m", 600),
+        ("1h30m", 5400),
+        ("1d12h", 129600),
+        ("", None),
+        ("1x", None),
+        ("h1", None),
+    ],
+)
+def test_parse_duration(value, expected):
+    assert timeparse._parse_duration(value) == expected
+
+
+@pytest.mark.parametrize(
+    "value, expected",
+    [
+        ("평일", 0b0011111),
+        ("weekends", 0b1100000),
+        ("mon-fri", 0b0011111),
+        ("fri-mon", 0b1110001),  # 주말을 넘어 감싸는 범위
+        ("월,수,금", 0b0010101),
+        ("foo", None),
+        ("mon-foo", None),
+    ],
+)
+def test_parse_days(value, expected):
+    assert timeparse._parse_days(value) == expected
+
+
+@pytest.mark.parametrize(
+    "value, expected",
+    [
+        ("22:00-08:00", (1320, 600)),
+        ("22:00+10h", (1320, 600)),
+        ("13:00+1h30m", (780, 90)),
+        ("09:00-09:00", (540, 1440)),
+        ("24:00-08:00", None),
+        ("22:00", None),
+    ],
+)
+def test_parse_time_range(value, expected):
+    assert timeparse._parse_time_range(value) == expected
+
+
+@pytest.mark.parametrize(
+    "value, expected",
+    [("KST", 540), ("UTC", 0), ("UTC+9", 540), ("-03:30", -210), ("UTC-5:30", -330), ("+15", None)],
+)
+def test_parse_utc_offset(value, expected):
+    assert timeparse._parse_utc_offset(value) == expected
+
+
+# 2026-10-16은 금요일
+@pytest.mark.parametrize(
+    "rules, now, expected_active, expected_next",
+    [
+        # 자정을 넘는 구간: 23:00에는 진행 중이고 다음 날 08:00에 끝남
+        (
+            [_rule("매일", "22:00-08:00", "KST")],
+            datetime(2026, 10, 14, 23, 0, tzinfo=KST),
+            True,
+            datetime(2026, 10, 15, 8, 0, tzinfo=KST),
+        ),
+        (
+            [_rule("매일", "22:00-08:00", "KST")],
+            datetime(2026, 10, 15, 8, 0, tzinfo=KST),
+            False,
+            datetime(2026, 10, 15, 22, 0, tzinfo=KST),
+        ),
+        # 평일 구간의 금→토 경계: 금요일 밤 구간은 토요일 아침까지 이어짐
+        (
+            [_rule("평일", "22:00-08:00", "KST")],
+            datetime(2026, 10, 17, 7, 59, tzinfo=KST),
+            True,
+            datetime(2026, 10, 17, 8, 0, tzinfo=KST),
+        ),
+        # 토요일 밤에는 시작하지 않고 다음 시작은 월요일 밤
+        (
+            [_rule("평일", "22:00-08:00", "KST")],
+            datetime(2026, 10, 17, 23, 0, tzinfo=KST),
+            False,
+            datetime(2026, 10, 19, 22, 0, tzinfo=KST),
+        ),
+        # 음수 30분 단위 시간대
+        (
+            [_rule("매일", "09:00-17:00", "-03:30")],
+            datetime(2026, 10, 16, 12, 0, tzinfo=NST),
+            True,
+            datetime(2026, 10, 16, 17, 0, tzinfo=NST),
+        ),
+        (
+            [_rule("매일", "09:00-17:00", "-03:30")],
+            datetime(2026, 10, 16, 8, 59, tzinfo=NST),
+            False,
+            datetime(2026, 10, 16, 9, 0, tzinfo=NST),
+        ),
+        # 겹치는 규칙은 하나의 구간으로 합쳐져 02:00이 아니라 06:00에 끝남
+        (
+            [_rule("매일", "22:00-02:00", "KST"), _rule("매일", "01:00-06:00", "KST")],
+            datetime(2026, 10, 14, 23, 0, tzinfo=KST),
+            True,
+            datetime(2026, 10, 15, 6, 0, tzinfo=KST),
+        ),
+        # 맞닿은 규칙도 이어서 하나의 구간
+        (
+            [_rule("매일", "20:00-22:00", "KST"), _rule("매일", "22:00-23:00", "KST")],
+            datetime(2026, 10, 14, 21, 0, tzinfo=KST),
+            True,
+            datetime(2026, 10, 14, 23, 0, tzinfo=KST),
+        ),
+    ],
+)
+def test_schedule_transition(rules, now, expected_active, expected_next):
+    active, next_ts = timeparse._schedule_transition(rules, _ts(now))
+    assert active is expected_active
+    assert next_ts == _ts(expected_next)
+
+
+def test_format_schedule_rule():
+    assert timeparse._format_schedule_rule(_rule("평일", "22:00-08:00", "KST")) == (
+        "평일 22:00-08:00 (UTC+9)"
+    )
+    assert timeparse._format_schedule_rule(_rule("fri-mon", "09:00+30m", "-03:30")) == (
+        "월,금,토,일 09:00-09:30 (UTC-3:30)"
+    )